@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 
 from pymine import Position, World, Chunk, BlockIDs, Entities, Game, Level, TextureMapper
@@ -11,19 +12,10 @@ from pymine import Position, World, Chunk, BlockIDs, Entities, Game, Level, Text
 def height_map(world: World, image_path: str):
     """Create a height map of the world"""
     logging.info('Creating height map of the world')
-    img = Image.new(
-        'RGB',
-        (world.chunks_per_direction * Chunk.X_SIZE, world.chunks_per_direction * Chunk.Z_SIZE)
-    )
     logging.info('Getting highest blocks')
-    for chunk in world:
-        for block in chunk:
-            if block.id == BlockIDs.AIR:
-                continue
-            img.putpixel(
-                (block.position.x, block.position.z),
-                (block.position.y, block.position.y, block.position.y)
-            )
+    # The heightmap is indexed by [x, z], images by [row, column]
+    heights = world.heightmap().clip(0).astype(np.uint8).T
+    img = Image.fromarray(heights, 'L').convert('RGB')
 
     image_path = Path(image_path)
     image_path.parent.mkdir(exist_ok=True)
@@ -35,35 +27,8 @@ def height_map(world: World, image_path: str):
 def top_down_view(world: World, image_path: str):
     """Create a top-down image of the world"""
     logging.info('Creating top-down image of the world')
-    view = Image.new(
-        'RGBA',
-        (
-            world.chunks_per_direction * Chunk.X_SIZE * mapper.TEXTURE_SIZE,
-            world.chunks_per_direction * Chunk.Z_SIZE * mapper.TEXTURE_SIZE
-        )
-    )
-
     logging.info('Rendering blocks')
-    for chunk in world:
-        for block in chunk:
-            if block.id == BlockIDs.AIR:
-                continue
-            view.paste(
-                Image.alpha_composite(
-                    mapper.top(block),
-                    Image.new(
-                        'RGBA',
-                        (mapper.TEXTURE_SIZE, mapper.TEXTURE_SIZE),
-                        (0, 0, 0, Chunk.Y_SIZE - 1 - block.position.y)
-                    )
-                ),
-                (
-                    block.position.x * mapper.TEXTURE_SIZE,
-                    block.position.z * mapper.TEXTURE_SIZE,
-                    block.position.x * mapper.TEXTURE_SIZE + mapper.TEXTURE_SIZE,
-                    block.position.z * mapper.TEXTURE_SIZE + mapper.TEXTURE_SIZE
-                )
-            )
+    view = mapper.render_top_down(world)
 
     image_path = Path(image_path)
     image_path.parent.mkdir(exist_ok=True)
@@ -125,28 +90,20 @@ def block_id_map(world, image_path):
     """Create a top-down image of the world"""
     logging.info('Creating block ID map of the world')
 
-    img = Image.new(
-        'RGBA',
-        (
-            world.chunks_per_direction * Chunk.X_SIZE * mapper.TEXTURE_SIZE,
-            world.chunks_per_direction * Chunk.Z_SIZE * mapper.TEXTURE_SIZE
-        )
-    )
+    size_x, size_z = world.heightmap().shape
+    img = Image.new('RGBA', (size_x * mapper.TEXTURE_SIZE, size_z * mapper.TEXTURE_SIZE))
 
     logging.info('Rendering blocks')
-    for chunk in world:
-        for block in chunk:
-            if block.id == BlockIDs.AIR:
-                continue
-            img.paste(
-                block_id_img(block.id),
-                (
-                    block.position.x * mapper.TEXTURE_SIZE,
-                    block.position.z * mapper.TEXTURE_SIZE,
-                    block.position.x * mapper.TEXTURE_SIZE + mapper.TEXTURE_SIZE,
-                    block.position.z * mapper.TEXTURE_SIZE + mapper.TEXTURE_SIZE
-                )
+    for block in world.iter_blocks(exclude=[BlockIDs.AIR]):
+        img.paste(
+            block_id_img(block.id),
+            (
+                block.position.x * mapper.TEXTURE_SIZE,
+                block.position.z * mapper.TEXTURE_SIZE,
+                block.position.x * mapper.TEXTURE_SIZE + mapper.TEXTURE_SIZE,
+                block.position.z * mapper.TEXTURE_SIZE + mapper.TEXTURE_SIZE
             )
+        )
 
     image_path = Path(image_path)
     image_path.parent.mkdir(exist_ok=True)
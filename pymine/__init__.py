@@ -1,4 +1,5 @@
-from .chunks import Position, World, Chunk, EmptyChunk, Block
+from .chunks import Position, World, Chunk, EmptyChunk, Block, BlockState, LazyChunkList, WorldDiff, WorldPatch
+from .cache import ChunkCache
 from .ids import BlockIDs, BiomeIDs, BlockID, BiomeID
 from .entities import Entities
 from .game import Game
@@ -15,6 +16,11 @@ __all__ = [
     'Chunk',
     'EmptyChunk',
     'Block',
+    'BlockState',
+    'LazyChunkList',
+    'WorldDiff',
+    'WorldPatch',
+    'ChunkCache',
     'BlockIDs',
     'BiomeIDs',
     'BlockID',
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import shutil
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .chunks import World
+
+
+class ChunkCache:
+    """
+    A persistent cache of the data derived from the chunks of ``chunks.dat`` files:
+    heightmaps, top blocks and block id counts.
+
+    Entries are keyed by the path of the file and are reused completely if the size and modification time of the file
+    did not change, otherwise only the data of chunks with an unchanged content hash is reused.
+    The arrays of an entry are stored as ``.npy`` files that are memory-mapped when they are read.
+    The least recently used entries are removed when the cache grows beyond ``max_size`` bytes.
+    """
+
+    ARRAYS = ('heightmaps', 'top_block_ids', 'top_block_meta', 'block_counts')
+    """The names of the cached arrays, each indexed by chunk index."""
+
+    directory: Path
+    """The directory the cache is stored in."""
+
+    max_size: int
+    """The maximum size of the cache in bytes."""
+
+    def __init__(self, directory: PathLike | str, max_size: int = 512 * 2 ** 20):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def __repr__(self):
+        return f'<ChunkCache directory={self.directory} max_size={self.max_size}>'
+
+    def _entry_directory(self, path: Path) -> Path:
+        return self.directory / hashlib.sha1(str(path.resolve()).encode()).hexdigest()
+
+    def restore(self, world: World) -> int:
+        """
+        Restore the cached data of the chunks of ``world`` and cache the data of all chunks that were not cached.
+        Returns the number of chunks whose data was restored.
+        """
+        stat = world.path.stat()
+        entry_directory = self._entry_directory(world.path)
+        entry = None
+        if (entry_directory / 'entry.json').exists():
+            entry = json.loads((entry_directory / 'entry.json').read_text())
+        same_file = entry is not None and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns)
+        arrays = {
+            name: np.load(entry_directory / f'{name}.npy', mmap_mode='r') for name in self.ARRAYS
+        } if entry is not None else {}
+
+        hashes: list[str | None] = [None] * len(world.chunks)
+        restored = 0
+        non_empty = 0
+        for idx in range(len(world.chunks)):
+            if world._is_empty_slot(idx):
+                continue
+            non_empty += 1
+            chunk = world.chunks[idx]
+            hashes[idx] = entry['hashes'][idx] if same_file else chunk.content_hash()
+            if entry is None or entry['hashes'][idx] is None or entry['hashes'][idx] != hashes[idx]:
+                continue
+            chunk._top_blocks = (
+                np.array(arrays['heightmaps'][idx]),
+                np.array(arrays['top_block_ids'][idx]),
+                np.array(arrays['top_block_meta'][idx])
+            )
+            chunk._block_counts = np.array(arrays['block_counts'][idx])
+            restored += 1
+        del arrays
+        logging.getLogger(__name__).debug(f'Restored cached data of {restored}/{non_empty} chunks')
+
+        if same_file and restored == non_empty:
+            (entry_directory / 'entry.json').touch()
+        else:
+            self._store(world, entry_directory, hashes, stat.st_size, stat.st_mtime_ns)
+            self._evict()
+        return restored
+
+    def _store(self, world: World, entry_directory: Path, hashes: list[str | None], size: int, mtime_ns: int) -> None:
+        arrays = {
+            'heightmaps': np.full((len(world.chunks), 16, 16), -1, np.int16),
+            'top_block_ids': np.zeros((len(world.chunks), 16, 16), np.uint8),
+            'top_block_meta': np.zeros((len(world.chunks), 16, 16), np.uint8),
+            'block_counts': np.zeros((len(world.chunks), 256), np.int64),
+        }
+        for idx in range(len(world.chunks)):
+            if hashes[idx] is None:
+                continue
+            chunk = world.chunks[idx]
+            arrays['heightmaps'][idx] = chunk.heightmap
+            arrays['top_block_ids'][idx] = chunk.top_block_ids
+            arrays['top_block_meta'][idx] = chunk.top_block_meta
+            arrays['block_counts'][idx] = chunk.block_counts
+
+        entry_directory.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(entry_directory / f'{name}.npy', array)
+        (entry_directory / 'entry.json').write_text(json.dumps({
+            'path': str(world.path.resolve()),
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'hashes': hashes,
+        }))
+
+    def _evict(self) -> None:
+        entries = [
+            (entry_directory, (entry_directory / 'entry.json').stat().st_mtime_ns)
+            for entry_directory in self.directory.iterdir()
+            if (entry_directory / 'entry.json').exists()
+        ]
+        sizes = {
+            entry_directory: sum(file.stat().st_size for file in entry_directory.iterdir())
+            for entry_directory, _ in entries
+        }
+        total_size = sum(sizes.values())
+        for entry_directory, _ in sorted(entries, key=lambda item: item[1]):
+            if total_size <= self.max_size:
+                break
+            logging.getLogger(__name__).debug(f'Evicting cache entry {entry_directory.name}')
+            shutil.rmtree(entry_directory)
+            total_size -= sizes[entry_directory]
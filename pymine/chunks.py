@@ -1,21 +1,48 @@
 from __future__ import annotations
 
+import hashlib
 import logging
-from dataclasses import dataclass
+import mmap
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import repeat
+from io import BytesIO
 from math import ceil, sqrt
 from os import PathLike
 from pathlib import Path
-from typing import Iterable
+from typing import BinaryIO, Callable, Iterable, NamedTuple
+from weakref import WeakValueDictionary
+
+import numpy as np
 
 from .ids import BlockIDs, BiomeIDs, BlockID, BiomeID, TRANSPARENT_BLOCKS, FULL_BLOCKS
+from .cache import ChunkCache
+from .lighting import compute_sky_light, compute_block_light, affects_block_light, update_block_light
 
 
-@dataclass
-class Position:
+class Position(NamedTuple):
+    """
+    An immutable block or chunk position.
+    Block positions inside the world can be packed into a single integer with ``pack``.
+    """
+
     x: int
     y: int
     z: int
 
+    def pack(self) -> int:
+        """Pack the block position into one integer, its index in a world-sized array indexed by [x, z, y]."""
+        return (self.x * World.MAX_CHUNKS_PER_DIRECTION * Chunk.Z_SIZE + self.z) * Chunk.Y_SIZE + self.y
+
+    @classmethod
+    def unpack(cls, key: int) -> Position:
+        """Create a block position from an integer created by ``pack``."""
+        xz, y = divmod(key, Chunk.Y_SIZE)
+        x, z = divmod(xz, World.MAX_CHUNKS_PER_DIRECTION * Chunk.Z_SIZE)
+        return cls(x, y, z)
+
     def down(self, number_of_blocks: int = 1) -> Position:
         return Position(x=self.x, y=self.y - number_of_blocks, z=self.z)
 
@@ -52,12 +79,45 @@ class Position:
 
 @dataclass
 class Block:
+    """
+    A block at a position.
+    Blocks returned by ``Chunk.get_block``, ``World.get_block``, ``Chunk.blocks`` and iterating over a chunk are views:
+    setting their ``id``, ``meta``, ``sky_light`` or ``block_light`` (also with ``update``) changes the chunk.
+    Block light around the block is not updated like ``World.update_block`` does.
+    """
+
     position: Position
     id: BlockID
     meta: int
     sky_light: int
     block_light: int
 
+    _chunk: Chunk | None = field(default=None, repr=False, compare=False)
+    """The chunk the block is a view of."""
+
+    _index: int = field(default=0, repr=False, compare=False)
+    """The index of the block in ``_chunk``."""
+
+    def __setattr__(self, name: str, value) -> None:
+        object.__setattr__(self, name, value)
+        if self._chunk is not None and name in ('id', 'meta', 'sky_light', 'block_light'):
+            self._chunk._set_block_at(self._index, self.id, self.meta, self.sky_light, self.block_light)
+
+    @classmethod
+    def _view(cls, chunk: Chunk, idx: int, position: Position, block_id: BlockID, meta: int, sky_light: int,
+              block_light: int) -> Block:
+        """Create a view of the block at ``idx`` of ``chunk``, without writing its values back."""
+        block = object.__new__(cls)
+        values = block.__dict__
+        values['position'] = position
+        values['id'] = block_id
+        values['meta'] = meta
+        values['sky_light'] = sky_light
+        values['block_light'] = block_light
+        values['_chunk'] = chunk
+        values['_index'] = idx
+        return block
+
     @property
     def is_transparent(self):
         return self.id in TRANSPARENT_BLOCKS
@@ -86,6 +146,122 @@ class Block:
         return self
 
 
+@dataclass(frozen=True)
+class BlockState:
+    """
+    The data of a block without its position.
+    Instances are shared, use ``BlockState.get`` to get the instance for a combination of values.
+    """
+
+    id: BlockID
+    meta: int
+    sky_light: int
+    block_light: int
+
+    __slots__ = ('id', 'meta', 'sky_light', 'block_light')
+
+    @property
+    def is_transparent(self):
+        return self.id in TRANSPARENT_BLOCKS
+
+    @property
+    def is_full_block(self):
+        return self.id in FULL_BLOCKS
+
+    @staticmethod
+    def pack(block_id: BlockID, meta: int, sky_light: int, block_light: int) -> int:
+        """Pack the values of a block state into one integer."""
+        return block_id << 12 | meta << 8 | sky_light << 4 | block_light
+
+    @classmethod
+    def get(cls, block_id: BlockID, meta: int, sky_light: int, block_light: int) -> BlockState:
+        """Get the shared block state with the given values."""
+        return cls.from_key(cls.pack(block_id, meta, sky_light, block_light))
+
+    @classmethod
+    def from_key(cls, key: int) -> BlockState:
+        """Get the shared block state for an integer created by ``pack``."""
+        state = _block_states.get(key)
+        if state is None:
+            state = _block_states[key] = cls(
+                id=key >> 12,
+                meta=key >> 8 & 0b1111,
+                sky_light=key >> 4 & 0b1111,
+                block_light=key & 0b1111
+            )
+        return state
+
+
+_block_states: dict[int, BlockState] = {}
+
+
+def unpack_nibbles(packed: np.ndarray) -> np.ndarray:
+    """Split a plane of packed nibbles into one value per block (high nibble first)."""
+    values = np.empty(len(packed) * 2, np.uint8)
+    values[0::2] = packed >> 4
+    values[1::2] = packed & 0b00001111
+    return values
+
+
+def pack_nibbles(values: np.ndarray) -> np.ndarray:
+    """Pack one value per block into a plane of nibbles (high nibble first)."""
+    values = np.asarray(values, np.uint8)
+    return (values[0::2] << 4) | (values[1::2] & 0b00001111)
+
+
+def map_file(path: Path) -> memoryview:
+    """Map a file read-only into memory."""
+    with path.open('rb') as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _derive_chunk_data(
+        path: str, slots: list[tuple[int, int]]
+) -> list[tuple[int, tuple[np.ndarray, np.ndarray, np.ndarray], np.ndarray, str]]:
+    """
+    Compute the top blocks, block id counts and content hash of the chunks in the given (index, chunk data index)
+    slots, used by the workers of ``World.load``.
+    """
+    data = map_file(Path(path))
+    derived = []
+    for idx, chunk_data_index in slots:
+        chunk = Chunk.from_bytes(World.chunk_payload(data, idx, chunk_data_index))
+        derived.append((idx, chunk._get_top_blocks(), chunk.block_counts, chunk.content_hash()))
+    return derived
+
+
+def _hash_planes(planes: Iterable[np.ndarray]) -> str:
+    """Hash the planes of a chunk in the order they are stored in ``chunks.dat``."""
+    content_hash = hashlib.blake2b(digest_size=16)
+    for plane in planes:
+        content_hash.update(np.ascontiguousarray(plane).data)
+    return content_hash.hexdigest()
+
+
+@lru_cache(maxsize=32)
+def _template_planes(
+        layers: tuple[BlockID, ...], biomes: tuple[BiomeID, ...]
+) -> tuple[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray], str]:
+    """
+    Build the read-only planes of a chunk made of ``layers`` by repeating one column of blocks.
+    Returns the planes and their content hash.
+    """
+    column = np.zeros(Chunk.Y_SIZE, np.uint8)
+    column[:len(layers)] = layers
+    # All columns are the same, so the light of one column is the light of the whole chunk
+    sky_light = compute_sky_light(column.reshape(1, 1, Chunk.Y_SIZE)).reshape(-1)
+    planes = (
+        np.tile(column, Chunk.X_SIZE * Chunk.Z_SIZE),
+        np.zeros(Chunk.BLOCK_COUNT // 2, np.uint8),
+        pack_nibbles(np.tile(sky_light, Chunk.X_SIZE * Chunk.Z_SIZE)),
+        np.zeros(Chunk.BLOCK_COUNT // 2, np.uint8),
+        np.array(biomes, np.uint8),
+    )
+    for plane in planes:
+        plane.flags.writeable = False
+    return planes, _hash_planes(planes)
+
+
 def fill_with_empty_chunks(chunks: list[Chunk]) -> list[Chunk]:
     chunks_per_direction = int(sqrt(len(chunks)))
     return [
@@ -105,6 +281,10 @@ def fill_with_empty_chunks(chunks: list[Chunk]) -> list[Chunk]:
 class Chunk:
     """
     A chunk is a 16x16x128 area of blocks.
+
+    Block data is kept in flat buffers using the on-disk layout of ``chunks.dat``.
+    ``Block`` objects are only created on demand when a block is requested.
+    The buffers may be read-only views into the loaded file, they are copied the first time the chunk is modified.
     """
 
     X_SIZE = 16
@@ -116,49 +296,245 @@ class Chunk:
     Y_SIZE = 128
     """The size of the chunk in the y direction (height)."""
 
-    blocks: list[Block]
-    """A list of all blocks in the chunk."""
+    BLOCK_COUNT = X_SIZE * Z_SIZE * Y_SIZE
+    """The number of blocks in a chunk."""
+
+    PLANES = ('block_ids', 'block_meta', 'sky_light', 'block_light')
+    """The names of the per-block data planes."""
 
-    biomes: list[BiomeID] | None
-    """A list of all biomes in the chunk."""
+    block_ids: np.ndarray
+    """The block ids of all blocks in the chunk, one byte per block."""
+
+    block_meta: np.ndarray
+    """The meta values of all blocks in the chunk, two nibbles per byte."""
+
+    sky_light: np.ndarray
+    """The sky light levels of all blocks in the chunk, two nibbles per byte."""
+
+    block_light: np.ndarray
+    """The block light levels of all blocks in the chunk, two nibbles per byte."""
+
+    biomes: np.ndarray
+    """The biome data of the chunk."""
 
     position: Position | None
     """The position of the chunk in the world."""
 
-    __slots__ = ('blocks', 'biomes', 'position')
+    __slots__ = (
+        'block_ids', 'block_meta', 'sky_light', 'block_light', 'biomes', 'position',
+        '_top_blocks', '_block_counts', '_block_indices', '_content_hash', '_shared_storage', '_changed',
+        '__weakref__'
+    )
 
-    def __init__(self, blocks: list[Block], biomes: list[BiomeID] = None, position: Position = None):
-        self.blocks = blocks
-        self.biomes = biomes
+    def __init__(self, block_ids: np.ndarray = None, block_meta: np.ndarray = None, sky_light: np.ndarray = None,
+                 block_light: np.ndarray = None, biomes: np.ndarray = None, position: Position = None,
+                 blocks: list[Block] = None):
+        """
+        Create a chunk from its planes in the layout of ``chunks.dat``,
+        or from ``blocks``, a list of all of its blocks in index order (see ``from_blocks``).
+        """
+        if blocks is not None:
+            block_ids = np.fromiter((block.id for block in blocks), np.uint8, len(blocks))
+            block_meta, sky_light, block_light = (
+                pack_nibbles(np.fromiter((getattr(block, name) for block in blocks), np.uint8, len(blocks)))
+                for name in ('meta', 'sky_light', 'block_light')
+            )
+            biomes = np.array(biomes, np.uint8) if biomes is not None else None
+        self.block_ids = block_ids
+        self.block_meta = block_meta
+        self.sky_light = sky_light
+        self.block_light = block_light
+        self.biomes = biomes if biomes is not None else np.full(self.X_SIZE * self.Z_SIZE, BiomeIDs.BID_0, np.uint8)
         self.position = position
+        self._top_blocks: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._block_counts: np.ndarray | None = None
+        self._block_indices: dict[BlockID, np.ndarray] = {}
+        self._content_hash: str | None = None
+        # The content hash of read-only planes that are shared with other chunks (see ``World.deduplicate``)
+        self._shared_storage: str | None = None
+        # Whether the chunk was changed since its world was last saved (see ``World.changed_chunks``)
+        self._changed = False
 
     def __repr__(self):
-        return f'<Chunk position={self.position} blocks={len(self.blocks)}>'
+        return f'<Chunk position={self.position} blocks={len(self.block_ids)}>'
 
     def __bytes__(self):
-        block_ids = b''.join(block.id.to_bytes(1, 'little') for block in self.blocks)
-        meta = b''.join(
-            (self.blocks[idx].meta << 4 | self.blocks[idx+1].meta).to_bytes(1, 'little')
-            for idx in range(0, len(self.blocks), 2)
+        f = BytesIO()
+        self.write_to(f)
+        return f.getvalue()
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the chunk in ``chunks.dat`` including its length header and padding."""
+        chunk_len = 4 + sum(
+            plane.nbytes for plane in (self.block_ids, self.block_meta, self.sky_light, self.block_light, self.biomes)
+        )
+        return ceil(chunk_len / World.CHUNK_BLOCK_SIZE) * World.CHUNK_BLOCK_SIZE
+
+    def write_to(self, f: BinaryIO) -> None:
+        """Write the chunk as stored in ``chunks.dat`` to the file object ``f``."""
+        planes = (self.block_ids, self.block_meta, self.sky_light, self.block_light, self.biomes)
+        chunk_len = 4 + sum(plane.nbytes for plane in planes)
+        f.write(chunk_len.to_bytes(4, 'little'))
+        for plane in planes:
+            f.write(np.ascontiguousarray(plane).data)
+        f.write(b'\x00' * (self.nbytes - chunk_len))
+
+    def content_hash(self) -> str:
+        """
+        A hash of the chunk's payload as stored in ``chunks.dat``, equal for chunks with equal content.
+        The hash is computed from the buffers the first time it is requested and kept until the chunk is modified.
+        """
+        if self._content_hash is None:
+            self._content_hash = _hash_planes(
+                (self.block_ids, self.block_meta, self.sky_light, self.block_light, self.biomes)
+            )
+        return self._content_hash
+
+    def payload(self) -> np.ndarray:
+        """A copy of the chunk's payload as stored in ``chunks.dat`` (without the length header and padding)."""
+        return np.concatenate((self.block_ids, self.block_meta, self.sky_light, self.block_light, self.biomes))
+
+    def changed_block_indices(self, other: Chunk) -> np.ndarray:
+        """Get the indices of the blocks whose id, meta or light differ from the blocks of ``other``."""
+        changed = self.block_ids != other.block_ids
+        for name in ('block_meta', 'sky_light', 'block_light'):
+            differing_bytes = getattr(self, name) != getattr(other, name)
+            if differing_bytes.any():
+                changed |= unpack_nibbles(getattr(self, name)) != unpack_nibbles(getattr(other, name))
+        return np.flatnonzero(changed)
+
+    def __iter__(self) -> Iterable[Block]:
+        return self.iter_blocks()
+
+    @property
+    def blocks(self) -> list[Block]:
+        """Views of all blocks of the chunk in index order (see ``Block``), created on each access."""
+        return list(self._iter_blocks(np.arange(len(self.block_ids))))
+
+    def iter_blocks(
+            self, read_only: bool = False, ids: Iterable[BlockID] = None, exclude: Iterable[BlockID] = None,
+            y_range: tuple[int, int] = None, bbox: tuple[Position, Position] = None
+    ) -> Iterable[Block] | Iterable[tuple[int, int, int, BlockState]]:
+        """
+        Iterate over the blocks of the chunk.
+        With ``read_only=True`` tuples of (x, y, z, BlockState) with shared block states are yielded instead of
+        ``Block`` objects.
+
+        The filters are applied to the block id plane before any block is created:
+        only blocks with one of ``ids`` and none of ``exclude`` are yielded,
+        ``y_range`` is an inclusive (min y, max y) tuple and ``bbox`` an inclusive (min position, max position) tuple
+        in the coordinates of the yielded blocks.
+        """
+        if not len(self.block_ids):
+            return iter(())
+        indices = self._matching_indices(
+            ids=None if ids is None else list(ids),
+            exclude=None if exclude is None else list(exclude),
+            y_range=y_range,
+            bbox=bbox
         )
-        sky_light = b''.join(
-            (self.blocks[idx].sky_light << 4 | self.blocks[idx+1].sky_light).to_bytes(1, 'little')
-            for idx in range(0, len(self.blocks), 2)
+        if not len(indices):
+            return iter(())
+        if read_only:
+            return self._iter_block_states(indices)
+        return self._iter_blocks(indices)
+
+    def _matching_indices(self, ids: list[BlockID] | None, exclude: list[BlockID] | None,
+                          y_range: tuple[int, int] | None, bbox: tuple[Position, Position] | None) -> np.ndarray:
+        """Get the indices of the blocks that match the filters of ``iter_blocks``."""
+        no_match = np.empty(0, np.intp)
+        if ids is not None and not self.block_counts[ids].any():
+            return no_match
+        if exclude and self.block_counts[np.unique(exclude)].sum() == self.BLOCK_COUNT:
+            return no_match
+
+        offset_x, offset_z = (
+            (self.position.x * self.X_SIZE, self.position.z * self.Z_SIZE) if self.position is not None else (0, 0)
         )
-        block_light = b''.join(
-            (self.blocks[idx].block_light << 4 | self.blocks[idx+1].block_light).to_bytes(1, 'little')
-            for idx in range(0, len(self.blocks), 2)
+        x_min, y_min, z_min, x_max, y_max, z_max = 0, 0, 0, self.X_SIZE - 1, self.Y_SIZE - 1, self.Z_SIZE - 1
+        if y_range is not None:
+            y_min, y_max = max(y_min, y_range[0]), min(y_max, y_range[1])
+        if bbox is not None:
+            min_position, max_position = bbox
+            x_min, x_max = max(x_min, min_position.x - offset_x), min(x_max, max_position.x - offset_x)
+            y_min, y_max = max(y_min, min_position.y), min(y_max, max_position.y)
+            z_min, z_max = max(z_min, min_position.z - offset_z), min(z_max, max_position.z - offset_z)
+        if (ids is not None and BlockIDs.AIR not in ids) or (exclude and BlockIDs.AIR in exclude):
+            # Nothing above the highest non-air block can match
+            y_max = min(y_max, int(self.heightmap.max()))
+        if x_min > x_max or y_min > y_max or z_min > z_max:
+            return no_match
+
+        block_ids = self.get_plane('block_ids')[x_min:x_max + 1, z_min:z_max + 1, y_min:y_max + 1]
+        mask = np.ones(block_ids.shape, bool)
+        if ids is not None:
+            mask &= np.isin(block_ids, ids)
+        if exclude:
+            mask &= ~np.isin(block_ids, exclude)
+        x, z, y = np.nonzero(mask)
+        return ((x + x_min) * self.Z_SIZE + z + z_min) * self.Y_SIZE + y + y_min
+
+    def _iter_blocks(self, indices: np.ndarray) -> Iterable[Block]:
+        block_ids = self.block_ids[indices].tolist()
+        block_meta = unpack_nibbles(self.block_meta)[indices].tolist()
+        sky_light = unpack_nibbles(self.sky_light)[indices].tolist()
+        block_light = unpack_nibbles(self.block_light)[indices].tolist()
+        for i, idx in enumerate(indices.tolist()):
+            yield Block._view(
+                self, idx, self._block_position(idx), block_ids[i], block_meta[i], sky_light[i], block_light[i]
+            )
+
+    def _iter_block_states(self, indices: np.ndarray) -> Iterable[tuple[int, int, int, BlockState]]:
+        keys = (
+            self.block_ids[indices].astype(np.uint32) << 12
+            | unpack_nibbles(self.block_meta)[indices].astype(np.uint32) << 8
+            | unpack_nibbles(self.sky_light)[indices].astype(np.uint32) << 4
+            | unpack_nibbles(self.block_light)[indices]
         )
-        biomes = b''.join(biome.to_bytes(1, 'little') for biome in self.biomes)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        states = np.array([BlockState.from_key(key) for key in unique_keys.tolist()], dtype=object)
+        x, z, y = np.unravel_index(indices, (self.X_SIZE, self.Z_SIZE, self.Y_SIZE))
+        if self.position is not None:
+            x = x + self.position.x * self.X_SIZE
+            z = z + self.position.z * self.Z_SIZE
+        return zip(x.tolist(), y.tolist(), z.tolist(), states[inverse].tolist())
 
-        data = b''.join([block_ids, meta, sky_light, block_light, biomes])
-        header = (len(data) + 4).to_bytes(4, 'little')
-        chunk_len = len(header) + len(data)
-        padding = b'\x00' * (ceil(chunk_len / World.CHUNK_BLOCK_SIZE) * World.CHUNK_BLOCK_SIZE - chunk_len)
-        return header + data + padding
+    @classmethod
+    def from_bytes(cls, data: bytes, position: Position = None) -> Chunk:
+        """
+        Create a chunk from its payload in ``chunks.dat`` (without the length header and padding).
+        The planes reference ``data`` without copying it.
+        """
+        nibble_size = cls.BLOCK_COUNT // 2
+        planes = np.frombuffer(data, dtype=np.uint8)
+        offset = cls.BLOCK_COUNT
+        return cls(
+            block_ids=planes[:offset],
+            block_meta=planes[offset:offset + nibble_size],
+            sky_light=planes[offset + nibble_size:offset + nibble_size * 2],
+            block_light=planes[offset + nibble_size * 2:offset + nibble_size * 3],
+            biomes=planes[offset + nibble_size * 3:],
+            position=position
+        )
 
-    def __iter__(self) -> Iterable[Block]:
-        return iter(self.blocks)
+    @classmethod
+    def from_planes(cls, block_ids: np.ndarray, block_meta: np.ndarray, sky_light: np.ndarray,
+                    block_light: np.ndarray, biomes: list[BiomeID] = None, position: Position = None) -> Chunk:
+        """Create a chunk from unpacked planes holding one value per block in index order."""
+        return cls(
+            block_ids=np.array(block_ids, np.uint8),
+            block_meta=pack_nibbles(block_meta),
+            sky_light=pack_nibbles(sky_light),
+            block_light=pack_nibbles(block_light),
+            biomes=np.array(biomes, np.uint8) if biomes is not None else None,
+            position=position
+        )
+
+    @classmethod
+    def from_blocks(cls, blocks: list[Block], biomes: list[BiomeID] = None, position: Position = None) -> Chunk:
+        """Create a chunk from a list of all of its blocks in index order."""
+        return cls(blocks=blocks, biomes=biomes, position=position)
 
     @classmethod
     def from_layered_template(
@@ -169,32 +545,22 @@ class Chunk:
         Each list item (Block ID) represents a layer of the chunk.
         Remaining space is filled with air.
         None == `BlockIDs.AIR` for convenience.
+        Chunks created from the same template share their storage until they are modified.
         """
-        def get_layer(idx: int) -> BlockID:
-            try:
-                block_id = layers[idx]
-            except IndexError:
-                block_id = None
-            if block_id is None:  # IndexError or None in layers
-                block_id = BlockIDs.AIR
-            return block_id
-
-        blocks = [
-            Block(
-                id=get_layer(idx % cls.Y_SIZE),
-                position=cls.index_to_block_position(idx),
-                meta=0,
-                # 15 if idx % cls.Y_SIZE + 1 != cls.Y_SIZE and get_layer(idx % cls.Y_SIZE + 1) == BlockIDs.AIR else 0,
-                sky_light=0,
-                block_light=0,
-            ) for idx in range(cls.X_SIZE * cls.Z_SIZE * cls.Y_SIZE)
-        ]
-
-        return cls(
-            blocks=blocks,
-            biomes=biomes or [BiomeIDs.BID_0] * cls.X_SIZE * cls.Z_SIZE,
+        (block_ids, block_meta, sky_light, block_light, biomes), content_hash = _template_planes(
+            tuple(BlockIDs.AIR if block_id is None else block_id for block_id in layers[:cls.Y_SIZE]),
+            tuple(biomes or [BiomeIDs.BID_0] * cls.X_SIZE * cls.Z_SIZE)
+        )
+        chunk = cls(
+            block_ids=block_ids,
+            block_meta=block_meta,
+            sky_light=sky_light,
+            block_light=block_light,
+            biomes=biomes,
             position=position
         )
+        chunk._content_hash = chunk._shared_storage = content_hash
+        return chunk
 
     @classmethod
     def index_to_block_position(cls, index: int) -> Position:
@@ -208,6 +574,165 @@ class Chunk:
     def position_to_index(cls, position: Position) -> int:
         return position.y + position.z * cls.Y_SIZE + position.x * cls.Z_SIZE * cls.Y_SIZE
 
+    @staticmethod
+    def _get_nibble(plane: np.ndarray, idx: int) -> int:
+        value = int(plane[idx >> 1])
+        return value & 0b00001111 if idx & 1 else (value & 0b11110000) >> 4
+
+    @staticmethod
+    def _set_nibble(plane: np.ndarray, idx: int, value: int) -> None:
+        current = int(plane[idx >> 1])
+        if idx & 1:
+            plane[idx >> 1] = (current & 0b11110000) | (value & 0b00001111)
+        else:
+            plane[idx >> 1] = (value & 0b00001111) << 4 | (current & 0b00001111)
+
+    def _block_position(self, idx: int) -> Position:
+        """The position of the block at ``idx`` in the world, or relative to the chunk if it has no position."""
+        x, z, y = idx // (self.Z_SIZE * self.Y_SIZE), idx // self.Y_SIZE % self.Z_SIZE, idx % self.Y_SIZE
+        if self.position is not None:
+            x += self.position.x * self.X_SIZE
+            z += self.position.z * self.Z_SIZE
+        return Position(x, y, z)
+
+    def _block_at(self, idx: int) -> Block:
+        return Block._view(
+            self,
+            idx,
+            self._block_position(idx),
+            int(self.block_ids[idx]),
+            self._get_nibble(self.block_meta, idx),
+            self._get_nibble(self.sky_light, idx),
+            self._get_nibble(self.block_light, idx)
+        )
+
+    def _ensure_writable(self) -> None:
+        self._changed = True
+        self._content_hash = None
+        self._shared_storage = None
+        for name in ('block_ids', 'block_meta', 'sky_light', 'block_light', 'biomes'):
+            plane = getattr(self, name)
+            if not plane.flags.writeable:
+                setattr(self, name, plane.copy())
+
+    def _set_block_at(self, idx: int, block_id: BlockID, meta: int = None, sky_light: int = None,
+                      block_light: int = None) -> None:
+        self._ensure_writable()
+        old_block_id = int(self.block_ids[idx])
+        self.block_ids[idx] = block_id
+        if meta is not None:
+            self._set_nibble(self.block_meta, idx, meta)
+        if sky_light is not None:
+            self._set_nibble(self.sky_light, idx, sky_light)
+        if block_light is not None:
+            self._set_nibble(self.block_light, idx, block_light)
+        self._update_top_block(idx)
+        self._update_block_index(old_block_id, block_id)
+
+    @property
+    def heightmap(self) -> np.ndarray:
+        """The y coordinate of the highest non-air block of each column, indexed by [x, z], -1 for empty columns."""
+        return self._get_top_blocks()[0]
+
+    @property
+    def top_block_ids(self) -> np.ndarray:
+        """The id of the highest non-air block of each column, indexed by [x, z]."""
+        return self._get_top_blocks()[1]
+
+    @property
+    def top_block_meta(self) -> np.ndarray:
+        """The meta value of the highest non-air block of each column, indexed by [x, z]."""
+        return self._get_top_blocks()[2]
+
+    def _get_top_blocks(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._top_blocks is None:
+            block_ids = self.get_plane('block_ids')
+            solid = block_ids != BlockIDs.AIR
+            heightmap = np.where(
+                solid.any(axis=2), self.Y_SIZE - 1 - np.argmax(solid[:, :, ::-1], axis=2), -1
+            ).astype(np.int16)
+            x, z = np.indices((self.X_SIZE, self.Z_SIZE))
+            y = heightmap.clip(0)
+            self._top_blocks = (
+                heightmap,
+                np.where(heightmap >= 0, block_ids[x, z, y], BlockIDs.AIR).astype(np.uint8),
+                np.where(heightmap >= 0, self.get_plane('block_meta')[x, z, y], 0).astype(np.uint8)
+            )
+        return self._top_blocks
+
+    def _update_top_block(self, idx: int) -> None:
+        """Keep the cached heightmap up to date after the block at ``idx`` changed."""
+        if self._top_blocks is None:
+            return
+        heightmap, top_block_ids, top_block_meta = self._top_blocks
+        x, z, y = idx // (self.Z_SIZE * self.Y_SIZE), idx // self.Y_SIZE % self.Z_SIZE, idx % self.Y_SIZE
+        if y < heightmap[x, z]:
+            return
+        column_start = idx - y
+        solid = np.flatnonzero(self.block_ids[column_start:column_start + self.Y_SIZE])
+        if not len(solid):
+            heightmap[x, z], top_block_ids[x, z], top_block_meta[x, z] = -1, BlockIDs.AIR, 0
+            return
+        top = column_start + int(solid[-1])
+        heightmap[x, z] = top - column_start
+        top_block_ids[x, z] = self.block_ids[top]
+        top_block_meta[x, z] = self._get_nibble(self.block_meta, top)
+
+    @property
+    def block_counts(self) -> np.ndarray:
+        """The number of blocks in the chunk per block id."""
+        if self._block_counts is None:
+            self._block_counts = np.bincount(self.block_ids, minlength=256)
+        return self._block_counts
+
+    def _update_block_index(self, old_block_id: BlockID, block_id: BlockID) -> None:
+        """Keep the block id index up to date after a block changed from ``old_block_id`` to ``block_id``."""
+        if old_block_id == block_id:
+            return
+        if self._block_counts is not None:
+            self._block_counts[old_block_id] -= 1
+            self._block_counts[block_id] += 1
+        self._block_indices.pop(old_block_id, None)
+        self._block_indices.pop(block_id, None)
+
+    def find_blocks(self, block_id: BlockID, block_meta: int = None) -> np.ndarray:
+        """Get the positions relative to the chunk of all blocks with ``block_id`` as rows of (x, y, z)."""
+        if not self.block_counts[block_id]:
+            return np.empty((0, 3), np.int32)
+        if block_id not in self._block_indices:
+            self._block_indices[block_id] = np.flatnonzero(self.block_ids == block_id)
+        indices = self._block_indices[block_id]
+        if block_meta is not None:
+            indices = indices[unpack_nibbles(self.block_meta)[indices] == block_meta]
+        x, z, y = np.unravel_index(indices, (self.X_SIZE, self.Z_SIZE, self.Y_SIZE))
+        return np.stack((x, y, z), axis=1).astype(np.int32)
+
+    def get_plane(self, name: str) -> np.ndarray:
+        """Get one of the ``PLANES`` with one value per block, indexed by [x, z, y]."""
+        plane = getattr(self, name)
+        if name != 'block_ids':
+            plane = unpack_nibbles(plane)
+        return plane.reshape(self.X_SIZE, self.Z_SIZE, self.Y_SIZE)
+
+    def set_plane(self, name: str, values: np.ndarray | int, slices: tuple[slice, slice, slice] = ...) -> None:
+        """Set the values of one of the ``PLANES`` inside ``slices``, indexed by [x, z, y]."""
+        self._ensure_writable()
+        if name in ('block_ids', 'block_meta'):
+            self._top_blocks = None
+        if name == 'block_ids':
+            self._block_counts = None
+            self._block_indices.clear()
+        if name == 'block_ids':
+            self.block_ids.reshape(self.X_SIZE, self.Z_SIZE, self.Y_SIZE)[slices] = values
+            return
+        plane = self.get_plane(name)
+        plane[slices] = values
+        getattr(self, name)[:] = pack_nibbles(plane.ravel())
+
+    def relight_sky(self) -> None:
+        """Compute the sky light of the chunk, without taking neighbouring chunks into account."""
+        self.set_plane('sky_light', compute_sky_light(self.get_plane('block_ids')))
+
     def get_block(self, relative_position: Position) -> Block:
         """Get block at position relative to chunk."""
         if not all((
@@ -216,7 +741,7 @@ class Chunk:
                 0 <= relative_position.z < self.Z_SIZE
         )):
             raise ValueError(f'Position must be inside the chunk! {relative_position}')
-        return self.blocks[self.position_to_index(relative_position)]
+        return self._block_at(self.position_to_index(relative_position))
 
     def update_block(self, relative_position: Position, block_id: BlockID, block_meta: int = None) -> None:
         """Update an existing block at position relative to chunk."""
@@ -226,22 +751,158 @@ class Chunk:
                 0 <= relative_position.z < self.Z_SIZE
         )):
             raise ValueError(f'Position must be inside the chunk! {relative_position}')
-        block = self.blocks[self.position_to_index(relative_position)]
-        block.id = block_id
-        if block_meta is not None:
-            block.meta = block_meta
+        self._set_block_at(self.position_to_index(relative_position), block_id, block_meta)
 
     def replace_block(self, block: Block):
         """Replace the block at position relative to chunk."""
-        self.blocks[self.position_to_index(block.position)] = block
+        relative_position = Position(
+            x=block.position.x % self.X_SIZE,
+            y=block.position.y,
+            z=block.position.z % self.Z_SIZE
+        )
+        self._set_block_at(
+            self.position_to_index(relative_position), block.id, block.meta, block.sky_light, block.block_light
+        )
 
 
 class EmptyChunk(Chunk):
     def __init__(self):
-        super().__init__([], None, None)  # type: ignore
+        empty = np.empty(0, np.uint8)
+        super().__init__(empty, empty, empty, empty, empty, None)
 
-    def __bytes__(self):
-        return b''
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def write_to(self, f: BinaryIO) -> None:
+        pass
+
+
+class LazyChunkList:
+    """
+    The chunks of a world that are decoded from ``chunks.dat`` the first time they are accessed.
+
+    Only the chunk index is read up front.
+    Decoded chunks are kept in an LRU cache holding up to ``cache_size`` chunks (unbounded if ``None``).
+    Evicted chunks are reused for as long as they are referenced elsewhere,
+    chunks that were changed through the world are never evicted.
+    With ``memory_map=True`` chunks are decoded from a read-only memory mapping of the file.
+    """
+
+    path: Path
+    """The path of the ``chunks.dat`` file."""
+
+    cache_size: int | None
+    """The maximum number of unchanged chunks to keep decoded."""
+
+    memory_map: bool
+    """Whether chunks are read from a memory mapping of the file."""
+
+    __slots__ = ('path', 'cache_size', 'memory_map', '_index', '_data', '_cache', '_alive', '_pinned')
+
+    def __init__(self, path: PathLike | str, cache_size: int = None, memory_map: bool = False):
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self.memory_map = memory_map
+        self._cache: OrderedDict[int, Chunk] = OrderedDict()
+        self._alive: WeakValueDictionary[int, Chunk] = WeakValueDictionary()
+        self._pinned: dict[int, Chunk] = {}
+        self.reload()
+
+    def __repr__(self):
+        return f'<LazyChunkList path={self.path} decoded={len(self._cache) + len(self._pinned)}>'
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self) -> Iterable[Chunk]:
+        return iter(self[idx] for idx in range(len(self)))
+
+    def __getitem__(self, idx: int | slice) -> Chunk | list[Chunk]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        idx = range(len(self))[idx]
+        if idx in self._pinned:
+            return self._pinned[idx]
+        if idx in self._cache:
+            self._cache.move_to_end(idx)
+            return self._cache[idx]
+        if self.is_empty(idx):
+            return EmptyChunk()
+
+        chunk = self._alive.get(idx)
+        if chunk is None:
+            chunk = self._decode(idx)
+            self._alive[idx] = chunk
+        self._cache[idx] = chunk
+        while self.cache_size is not None and len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return chunk
+
+    def __setitem__(self, idx: int, chunk: Chunk) -> None:
+        idx = range(len(self))[idx]
+        self._cache.pop(idx, None)
+        self._alive.pop(idx, None)
+        self._pinned[idx] = chunk
+
+    def is_empty(self, idx: int) -> bool:
+        """Check whether the chunk at index ``idx`` is empty without decoding it."""
+        if idx in self._pinned:
+            return isinstance(self._pinned[idx], EmptyChunk)
+        return self._index[idx] == (0, 0)
+
+    def nbytes(self, idx: int) -> int:
+        """
+        The size of the chunk at index ``idx`` as written to ``chunks.dat`` (see ``Chunk.nbytes``).
+        Chunks that are not decoded are sized from their length header without decoding them.
+        """
+        for chunks in (self._pinned, self._cache, self._alive):
+            chunk = chunks.get(idx)
+            if chunk is not None:
+                return chunk.nbytes
+        if self.is_empty(idx):
+            return 0
+        reserved_block_sizes, chunk_data_index = self._index[idx]
+        offset = chunk_data_index * World.CHUNK_BLOCK_SIZE
+        if self._data is not None:
+            chunk_length = int.from_bytes(self._data[offset:offset + 4], 'little')
+        else:
+            with self.path.open('rb') as f:
+                f.seek(offset)
+                chunk_length = int.from_bytes(f.read(4), 'little')
+        return ceil(chunk_length / World.CHUNK_BLOCK_SIZE) * World.CHUNK_BLOCK_SIZE
+
+    def decoded(self) -> Iterable[tuple[int, Chunk]]:
+        """The (index, chunk) pairs of all chunks that are currently decoded, without decoding any chunk."""
+        decoded = {**self._alive, **self._cache, **self._pinned}
+        return decoded.items()
+
+    def pin(self, idx: int) -> Chunk:
+        """Keep the chunk at index ``idx`` decoded, e.g. because it is changed, and return it."""
+        chunk = self[idx]
+        self[idx] = chunk
+        return chunk
+
+    def reload(self) -> None:
+        """Read the chunk index from ``chunks.dat``, e.g. after the file was rewritten."""
+        self._data = map_file(self.path) if self.memory_map else None
+        if self._data is not None:
+            self._index = World.parse_chunk_index(self._data[:World.CHUNK_BLOCK_SIZE])
+            return
+        with self.path.open('rb') as f:
+            self._index = World.parse_chunk_index(f.read(World.CHUNK_BLOCK_SIZE))
+
+    def _decode(self, idx: int) -> Chunk:
+        reserved_block_sizes, chunk_data_index = self._index[idx]
+        if self._data is not None:
+            return World.decode_chunk(self._data, idx, chunk_data_index)
+        with self.path.open('rb') as f:
+            f.seek(chunk_data_index * World.CHUNK_BLOCK_SIZE)
+            chunk_length = int.from_bytes(f.read(4), 'little')  # without padding
+            if chunk_length == 0:
+                raise ValueError(f'Chunk {idx} is empty!')
+            chunk_data = f.read(chunk_length - 4)
+        return Chunk.from_bytes(chunk_data, position=World.index_to_chunk_position(idx))
 
 
 @dataclass(repr=False)
@@ -249,52 +910,184 @@ class World:
     CHUNK_BLOCK_SIZE = 4096
     MAX_CHUNKS_PER_DIRECTION = 32
 
-    chunks: list[Chunk]
+    chunks: list[Chunk] | LazyChunkList
 
-    __slots__ = ('chunks', )
+    path: Path | None
+    """The ``chunks.dat`` file the world was last loaded from or saved to."""
 
-    def __init__(self, chunks: list[Chunk]):
+    dirty_chunks: set[int]
+    """
+    The indices of chunks that were changed through the world since it was last loaded or saved,
+    see ``changed_chunks`` for all changed chunks.
+    """
+
+    __slots__ = ('chunks', 'path', 'dirty_chunks')
+
+    def __init__(self, chunks: list[Chunk] | LazyChunkList, path: PathLike | str = None):
+        self.path = Path(path) if path is not None else None
+        self.dirty_chunks = set()
+        if isinstance(chunks, LazyChunkList):
+            self.chunks = chunks
+            return
         self.chunks = chunks if len(chunks) == self.MAX_CHUNKS_PER_DIRECTION ** 2 else fill_with_empty_chunks(chunks)
+        for idx, chunk in enumerate(self.chunks):
+            if not isinstance(chunk, EmptyChunk):
+                chunk.position = self.index_to_chunk_position(idx)
 
     def __repr__(self):
-        empty_chunks = sum(1 for chunk in self.chunks if isinstance(chunk, EmptyChunk))
+        empty_chunks = sum(1 for idx in range(len(self.chunks)) if self._is_empty_slot(idx))
         return f'<World chunks={len(self.chunks) - empty_chunks} empty_chunks={empty_chunks}>'
 
     def __bytes__(self):
-        chunk_index = b''
-        chunk_data = b''
-        data_index = 1
+        f = BytesIO()
+        self.write_to(f)
+        return f.getvalue()
 
-        for chunk in self.chunks:
-            if isinstance(chunk, EmptyChunk):
-                chunk_index += (0).to_bytes(4, 'little')
+    def write_to(self, f: BinaryIO) -> None:
+        """
+        Write the world as stored in ``chunks.dat`` to the file object ``f``, which does not need to be seekable.
+        The chunk index is computed from the chunk sizes without encoding the chunks, then each chunk is written once.
+        """
+        data_index = 1
+        chunk_index = []
+        for idx in range(len(self.chunks)):
+            if self._is_empty_slot(idx):
+                chunk_index.append(self._chunk_index_entry(0, 0))
                 continue
-            data = bytes(chunk)
-            chunk_data += data
-            reserved_block_sizes = ceil(len(data) / self.CHUNK_BLOCK_SIZE)
-            chunk_index += reserved_block_sizes.to_bytes(1, 'little')
-            chunk_index += data_index.to_bytes(3, 'little')
+            reserved_block_sizes = self._chunk_nbytes(idx) // self.CHUNK_BLOCK_SIZE
+            chunk_index.append(self._chunk_index_entry(reserved_block_sizes, data_index))
             data_index += reserved_block_sizes
+        f.write(b''.join(chunk_index))
+
+        # Chunks sharing their planes (see ``deduplicate``) are encoded the second time they are written
+        # and that encoding is reused for all further chunks sharing them
+        shared_storage_seen = set()
+        encoded_chunks: dict[str, bytes] = {}
+        for idx in range(len(self.chunks)):
+            if self._is_empty_slot(idx):
+                continue
+            chunk = self.chunks[idx]
+            shared_storage = chunk._shared_storage
+            if shared_storage is None or shared_storage not in shared_storage_seen:
+                shared_storage_seen.add(shared_storage)
+                chunk.write_to(f)
+                continue
+            if shared_storage not in encoded_chunks:
+                encoded_chunks[shared_storage] = bytes(chunk)
+            f.write(encoded_chunks[shared_storage])
 
-        return chunk_index + chunk_data
+    def _chunk_nbytes(self, idx: int) -> int:
+        """The size of the chunk at ``idx`` in ``chunks.dat``, without decoding a lazily loaded chunk."""
+        if isinstance(self.chunks, LazyChunkList):
+            return self.chunks.nbytes(idx)
+        return self.chunks[idx].nbytes
 
     def __iter__(self) -> Iterable[Chunk]:
-        return iter(self.non_empty_chunks)
+        return iter(self.chunks[idx] for idx in range(len(self.chunks)) if not self._is_empty_slot(idx))
 
-    def iter_blocks(self) -> Iterable[Block]:
-        return iter(block for chunk in self for block in chunk)
+    def iter_blocks(
+            self, read_only: bool = False, ids: Iterable[BlockID] = None, exclude: Iterable[BlockID] = None,
+            y_range: tuple[int, int] = None, bbox: tuple[Position, Position] = None
+    ) -> Iterable[Block] | Iterable[tuple[int, int, int, BlockState]]:
+        """
+        Iterate lazily over the blocks of the world.
+        With ``read_only=True`` tuples of (x, y, z, BlockState) with shared block states are yielded instead of
+        ``Block`` objects.
+
+        The filters are applied to the block id planes before any block is created (see ``Chunk.iter_blocks``),
+        chunks that cannot contain a matching block are skipped.
+        ``bbox`` is an inclusive (min position, max position) tuple in world coordinates.
+        """
+        ids = None if ids is None else list(ids)
+        exclude = None if exclude is None else list(exclude)
+        for idx in range(len(self.chunks)):
+            if self._is_empty_slot(idx):
+                continue
+            if bbox is not None:
+                chunk_position = self.index_to_chunk_position(idx)
+                min_position, max_position = bbox
+                if not (
+                        min_position.x // Chunk.X_SIZE <= chunk_position.x <= max_position.x // Chunk.X_SIZE
+                        and min_position.z // Chunk.Z_SIZE <= chunk_position.z <= max_position.z // Chunk.Z_SIZE
+                ):
+                    continue
+            yield from self.chunks[idx].iter_blocks(
+                read_only=read_only, ids=ids, exclude=exclude, y_range=y_range, bbox=bbox
+            )
 
     @property
     def non_empty_chunks(self):
-        return list(filter(lambda chunk: not isinstance(chunk, EmptyChunk), self.chunks))
+        return [self.chunks[idx] for idx in range(len(self.chunks)) if not self._is_empty_slot(idx)]
 
     @property
     def empty_chunks(self):
-        return list(filter(lambda chunk: isinstance(chunk, EmptyChunk), self.chunks))
+        return [self.chunks[idx] for idx in range(len(self.chunks)) if self._is_empty_slot(idx)]
 
     @property
     def chunks_per_direction(self) -> int:
-        return int(sqrt(len(self.non_empty_chunks)))
+        return int(sqrt(sum(1 for idx in range(len(self.chunks)) if not self._is_empty_slot(idx))))
+
+    def deduplicate(self) -> int:
+        """
+        Let chunks with equal content hashes share one read-only copy of their planes,
+        which is copied as soon as one of them is modified.
+        Returns the number of chunks that share the planes of another chunk.
+        """
+        if isinstance(self.chunks, LazyChunkList):
+            raise ValueError('The chunks of a lazily loaded world cannot be deduplicated')
+        shared_planes: dict[str, tuple[np.ndarray, ...]] = {}
+        shared_chunks = 0
+        for chunk in self:
+            content_hash = chunk.content_hash()
+            if content_hash in shared_planes:
+                shared_chunks += 1
+            else:
+                planes = tuple(
+                    np.array(plane)
+                    for plane in (chunk.block_ids, chunk.block_meta, chunk.sky_light, chunk.block_light, chunk.biomes)
+                )
+                for plane in planes:
+                    plane.flags.writeable = False
+                shared_planes[content_hash] = planes
+            chunk.block_ids, chunk.block_meta, chunk.sky_light, chunk.block_light, chunk.biomes = (
+                shared_planes[content_hash]
+            )
+            chunk._shared_storage = content_hash
+        logging.getLogger(__name__).debug(
+            f'Deduplicated {shared_chunks} chunks into {len(shared_planes)} distinct chunks'
+        )
+        return shared_chunks
+
+    def _is_empty_slot(self, idx: int) -> bool:
+        if idx >= len(self.chunks):
+            return True
+        if isinstance(self.chunks, LazyChunkList):
+            return self.chunks.is_empty(idx)
+        return isinstance(self.chunks[idx], EmptyChunk)
+
+    def changed_chunks(self) -> set[int]:
+        """
+        The indices of all chunks that were changed since the world was last loaded or saved,
+        including chunks that were changed directly instead of through the world, e.g. with ``Chunk.update_block``.
+        Changed chunks of a lazily loaded world are pinned so their changes are kept.
+        """
+        if isinstance(self.chunks, LazyChunkList):
+            changed = {idx for idx, chunk in self.chunks.decoded() if chunk._changed}
+            for idx in changed - self.dirty_chunks:
+                self.chunks.pin(idx)
+        else:
+            changed = {idx for idx, chunk in enumerate(self.chunks) if chunk._changed}
+        return self.dirty_chunks | changed
+
+    def _mark_changed(self, idx: int) -> Chunk:
+        """
+        Record that the chunk at ``idx`` is changed and return it.
+        Changes must be made to the returned chunk, a lazily loaded chunk is only kept from then on.
+        """
+        self.dirty_chunks.add(idx)
+        if isinstance(self.chunks, LazyChunkList):
+            return self.chunks.pin(idx)
+        return self.chunks[idx]
 
     @staticmethod
     def global_to_chunk_position(position: Position) -> tuple[Position, Position]:
@@ -328,121 +1121,653 @@ class World:
 
     @classmethod
     def chunk_position_to_index(cls, position: Position) -> int:
-        return cls.MAX_CHUNKS_PER_DIRECTION * position.y + position.z
+        return cls.MAX_CHUNKS_PER_DIRECTION * position.z + position.x
+
+    @classmethod
+    def parse_chunk_index(cls, chunk_index: bytes) -> list[tuple[int, int]]:
+        """
+        Parse the chunk index at the start of ``chunks.dat``.
+        Each entry is a tuple of (reserved chunk blocks, chunk data index), (0, 0) marks an empty chunk.
+        """
+        return [
+            (chunk_index[i], int.from_bytes(chunk_index[i + 1:i + 4], 'little'))
+            for i in range(0, len(chunk_index), 4)
+        ]
+
+    @classmethod
+    def chunk_payload(cls, data: memoryview, idx: int, chunk_data_index: int) -> memoryview:
+        """Get the payload of the chunk at index ``idx`` stored at ``chunk_data_index`` in ``chunks.dat``."""
+        chunk_data_offset = chunk_data_index * cls.CHUNK_BLOCK_SIZE
+        chunk_header_block = data[chunk_data_offset:chunk_data_offset + 4]
+        chunk_length = int.from_bytes(chunk_header_block, 'little')  # without padding
+        if chunk_length == 0:
+            raise ValueError(f'Chunk {idx} is empty!')
+        return data[chunk_data_offset + 4:chunk_data_offset + chunk_length]
 
     @classmethod
-    def load(cls, path: PathLike | str) -> World:
+    def decode_chunk(cls, data: memoryview, idx: int, chunk_data_index: int) -> Chunk:
+        """Decode the chunk at index ``idx`` stored at ``chunk_data_index`` in ``chunks.dat``."""
+        return Chunk.from_bytes(
+            cls.chunk_payload(data, idx, chunk_data_index),
+            position=cls.index_to_chunk_position(idx)
+        )
+
+    @classmethod
+    def load(cls, path: PathLike | str, lazy: bool = False, cache_size: int = None,
+             memory_map: bool = False, workers: int = None, index_blocks: bool = False,
+             cache: ChunkCache = None, deduplicate: bool = False) -> World:
+        """
+        Load a world from ``chunks.dat``.
+        With ``lazy=True`` only the chunk index is read and each chunk is decoded the first time it is accessed,
+        keeping at most ``cache_size`` unchanged chunks decoded.
+        With ``memory_map=True`` the file is memory-mapped and chunks reference its pages until they are modified.
+        With ``workers`` greater than one the heightmaps, top blocks, block id counts and content hashes of all chunks
+        are computed up front by a pool of that many processes.
+        With ``index_blocks=True`` the block id index used by ``find_blocks`` is built for all chunks up front,
+        otherwise it is built the first time a chunk is searched.
+        With a ``cache`` the heightmaps, top blocks and block id indices of unchanged chunks are restored from it
+        and those of all other chunks are computed and stored in it. A cache cannot be used with ``lazy=True``.
+        With ``deduplicate=True`` chunks with equal content share their planes (see ``deduplicate``),
+        this cannot be used with ``lazy=True`` either.
+        """
         path = Path(path)
+        if lazy and cache is not None:
+            raise ValueError('A chunk cache cannot be used with lazy loading')
+        if lazy and deduplicate:
+            raise ValueError('Chunks cannot be deduplicated with lazy loading')
         logging.getLogger(__name__).debug(f'Loading file: {path.name} ({path.stat().st_size / 1_000_000:.2f} MB)')
-        with path.open('rb') as f:
-            data = f.read()
+        if lazy:
+            return cls(chunks=LazyChunkList(path, cache_size=cache_size, memory_map=memory_map), path=path)
+        world = cls._load(path, memory_map)
+        if workers is not None and workers > 1:
+            world._derive_parallel(workers)
+        if deduplicate:
+            world.deduplicate()
+        if cache is not None:
+            cache.restore(world)
+        if index_blocks:
+            for chunk in world:
+                _ = chunk.block_counts  # builds the block id index
+        return world
+
+    @classmethod
+    def _load(cls, path: Path, memory_map: bool) -> World:
+        if memory_map:
+            data = map_file(path)
+        else:
+            with path.open('rb') as f:
+                data = memoryview(f.read())
 
         chunks = []
-        chunk_index = data[:cls.CHUNK_BLOCK_SIZE]
-        chunk_headers = [chunk_index[i:i + 4] for i in range(0, len(chunk_index), 4)]
-        for idx, chunk_header in enumerate(chunk_headers):
-            reserved_block_sizes = chunk_header[0]  # How many chunk blocks of storage are reserved for this chunk
-            chunk_data_index = int.from_bytes(chunk_header[1:], 'little')
+        for idx, (reserved_block_sizes, chunk_data_index) in enumerate(
+                cls.parse_chunk_index(data[:cls.CHUNK_BLOCK_SIZE])
+        ):
+            # reserved_block_sizes: How many chunk blocks of storage are reserved for this chunk
             if chunk_data_index == 0 and reserved_block_sizes == 0:
                 chunks.append(EmptyChunk())
                 continue
-            chunk_data_offset = chunk_data_index * cls.CHUNK_BLOCK_SIZE
-            chunk_header_block = data[chunk_data_offset:chunk_data_offset + 4]
-            chunk_length = int.from_bytes(chunk_header_block, 'little')  # without padding
-            if chunk_length == 0:
-                raise ValueError(f'Chunk {idx} is empty!')
-            chunk_data = data[chunk_data_offset + 4:chunk_data_offset + chunk_length]
-
-            block_size = Chunk.X_SIZE * Chunk.Z_SIZE * Chunk.Y_SIZE
-            block_ids = chunk_data[:block_size]
-            block_meta = [
-                item
-                for sublist
-                in (
-                    ((meta & 0b11110000) >> 4, meta & 0b00001111)
-                    for meta
-                    in chunk_data[block_size:int(block_size * 1.5)]
-                )
-                for item
-                in sublist
-            ]
-            block_sky_light = [
-                item
-                for sublist
-                in (
-                    ((lighting & 0b11110000) >> 4, lighting & 0b00001111)
-                    for lighting
-                    in chunk_data[int(block_size * 1.5):block_size * 2]
-                )
-                for item
-                in sublist
-            ]
-            block_light = [
-                item
-                for sublist
-                in (
-                    ((lighting & 0b11110000) >> 4, lighting & 0b00001111)
-                    for lighting
-                    in chunk_data[block_size * 2:int(block_size * 2.5)]
-                )
-                for item
-                in sublist
-            ]
-            block_biomes = [biome for biome in chunk_data[int(block_size * 2.5):]]
-
-            chunk_position = cls.index_to_chunk_position(idx)
-            blocks = [
-                Block(
-                    position=cls.chunk_to_global_position(chunk_position, Chunk.index_to_block_position(block_idx)),
-                    id=block_ids[block_idx],
-                    meta=block_meta[block_idx],
-                    sky_light=block_sky_light[block_idx],
-                    block_light=block_light[block_idx],
-                )
-                for block_idx in range(block_size)
-            ]
-            chunks.append(Chunk(blocks=blocks, biomes=block_biomes, position=chunk_position))
+            chunks.append(cls.decode_chunk(data, idx, chunk_data_index))
         logging.getLogger(__name__).debug(f'Loaded {len(chunks)} chunks')
-        return cls(chunks=chunks)
+        return cls(chunks=chunks, path=path)
+
+    def _derive_parallel(self, workers: int) -> None:
+        """Compute the derived data of all chunks with a pool of ``workers`` processes reading ``self.path``."""
+        with self.path.open('rb') as f:
+            chunk_index = self.parse_chunk_index(f.read(self.CHUNK_BLOCK_SIZE))
+        slots = [
+            (idx, chunk_data_index)
+            for idx, (reserved_block_sizes, chunk_data_index) in enumerate(chunk_index)
+            if chunk_data_index != 0 or reserved_block_sizes != 0
+        ]
+        batch_size = max(1, ceil(len(slots) / (workers * 4)))
+        batches = [slots[i:i + batch_size] for i in range(0, len(slots), batch_size)]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for derived in executor.map(_derive_chunk_data, repeat(str(self.path)), batches):
+                for idx, top_blocks, block_counts, content_hash in derived:
+                    chunk = self.chunks[idx]
+                    chunk._top_blocks = top_blocks
+                    chunk._block_counts = block_counts
+                    chunk._content_hash = content_hash
+        logging.getLogger(__name__).debug(f'Computed the data of {len(slots)} chunks with {workers} workers')
 
-    def save(self, path: PathLike | str) -> None:
+    @staticmethod
+    def _chunk_index_entry(reserved_block_sizes: int, chunk_data_index: int) -> bytes:
+        return reserved_block_sizes.to_bytes(1, 'little') + chunk_data_index.to_bytes(3, 'little')
+
+    def save(self, path: PathLike | str, incremental: bool = False) -> None:
+        """
+        Save the world to ``chunks.dat``.
+        The file is written next to ``path`` and then replaced,
+        so chunks that are memory-mapped from the previous file stay valid.
+
+        With ``incremental=True`` and ``path`` being the file the world was loaded from or last saved to,
+        only the changed chunks are written into their reserved blocks of the existing file instead.
+        Chunks that no longer fit are moved to the end of the file.
+        """
         path = Path(path)
-        path.parent.mkdir(exist_ok=True)
-        path.write_bytes(bytes(self))
+        if incremental and self.path is not None and path.exists() and path.resolve() == self.path.resolve():
+            self._save_incremental(path, self.changed_chunks())
+        else:
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with tmp_path.open('wb') as f:
+                self.write_to(f)
+            tmp_path.replace(path)
+        self.path = path
+        self.dirty_chunks.clear()
+        for _, chunk in (self.chunks.decoded() if isinstance(self.chunks, LazyChunkList) else enumerate(self.chunks)):
+            chunk._changed = False
+        if isinstance(self.chunks, LazyChunkList) and self.chunks.path.resolve() == path.resolve():
+            self.chunks.reload()
+
+    def _save_incremental(self, path: Path, changed_chunks: set[int]) -> None:
+        with path.open('r+b') as f:
+            chunk_index = self.parse_chunk_index(f.read(self.CHUNK_BLOCK_SIZE))
+            end_block = ceil(f.seek(0, 2) / self.CHUNK_BLOCK_SIZE)
+            for idx in sorted(changed_chunks):
+                chunk = self.chunks[idx]
+                needed_block_sizes = chunk.nbytes // self.CHUNK_BLOCK_SIZE
+                reserved_block_sizes, chunk_data_index = chunk_index[idx]
+                if needed_block_sizes == 0:
+                    chunk_index[idx] = (0, 0)
+                    continue
+                if needed_block_sizes > reserved_block_sizes:
+                    reserved_block_sizes, chunk_data_index = needed_block_sizes, end_block
+                    end_block += needed_block_sizes
+                    chunk_index[idx] = (reserved_block_sizes, chunk_data_index)
+                f.seek(chunk_data_index * self.CHUNK_BLOCK_SIZE)
+                chunk.write_to(f)
+            f.seek(0)
+            f.write(b''.join(self._chunk_index_entry(*entry) for entry in chunk_index))
+        logging.getLogger(__name__).debug(f'Saved {len(changed_chunks)} changed chunks to {path.name}')
+
+    def _block_index(self, x: int, y: int, z: int) -> tuple[int, int]:
+        """Get the chunk index and the block index inside that chunk of a block position."""
+        world_size = self.MAX_CHUNKS_PER_DIRECTION * Chunk.X_SIZE
+        if not (0 <= x < world_size and 0 <= y < Chunk.Y_SIZE and 0 <= z < world_size):
+            raise ValueError(f'Position must be inside the world! ({x}, {y}, {z})')
+        return (
+            z // Chunk.Z_SIZE * self.MAX_CHUNKS_PER_DIRECTION + x // Chunk.X_SIZE,
+            (x % Chunk.X_SIZE * Chunk.Z_SIZE + z % Chunk.Z_SIZE) * Chunk.Y_SIZE + y
+        )
 
     def get_block(self, absolute_block_position: Position) -> Block:
         """Get block relative to world."""
-        chunk_position, chunk_relative_block_position = self.global_to_chunk_position(position=absolute_block_position)
-        return self.chunks[self.chunk_position_to_index(chunk_position)].get_block(
-            relative_position=chunk_relative_block_position
-        )
+        return self.get_block_xyz(absolute_block_position.x, absolute_block_position.y, absolute_block_position.z)
+
+    def get_block_xyz(self, x: int, y: int, z: int) -> Block:
+        """Get block relative to world by its coordinates, without creating positions for the lookup."""
+        idx, block_idx = self._block_index(x, y, z)
+        return self.chunks[idx]._block_at(block_idx)
 
     def update_block(self, absolute_block_position: Position, block_id: BlockID, block_meta: int = None) -> None:
-        chunk_position, chunk_relative_block_position = self.global_to_chunk_position(position=absolute_block_position)
-        self.chunks[self.chunk_position_to_index(chunk_position)].update_block(
-            relative_position=chunk_relative_block_position,
-            block_id=block_id,
-            block_meta=block_meta
+        self.update_block_xyz(
+            absolute_block_position.x, absolute_block_position.y, absolute_block_position.z, block_id, block_meta
         )
 
+    def update_block_xyz(self, x: int, y: int, z: int, block_id: BlockID, block_meta: int = None) -> None:
+        """
+        Update block relative to world by its coordinates, without creating positions for the lookup.
+        The block light around the block is updated if the change adds, removes or blocks light.
+        """
+        idx, block_idx = self._block_index(x, y, z)
+        chunk = self._mark_changed(idx)
+        old_block_id = int(chunk.block_ids[block_idx])
+        chunk._set_block_at(block_idx, block_id, block_meta)
+        if affects_block_light(old_block_id, block_id):
+            update_block_light(self, x, y, z)
+
     def replace_block(self, block: Block):
         chunk_position, chunk_relative_block_position = self.global_to_chunk_position(position=block.position)
-        self.chunks[self.chunk_position_to_index(chunk_position)].replace_block(block)
+        idx = self.chunk_position_to_index(chunk_position)
+        self._mark_changed(idx).replace_block(block)
+
+    def _stitch_chunk_planes(self, get_plane: Callable[[Chunk], np.ndarray], fill_value: int,
+                             dtype: type) -> np.ndarray:
+        """
+        Combine a per-column array of each chunk into one array for the world, indexed by [x, z].
+        The array reaches from the world origin to the furthest non-empty chunk in each direction.
+        """
+        bounds = self._non_empty_chunk_bounds()
+        size_x, size_z = (bounds[1].x + 1, bounds[1].z + 1) if bounds is not None else (0, 0)
+        result = np.full((size_x * Chunk.X_SIZE, size_z * Chunk.Z_SIZE), fill_value, dtype)
+        for idx in range(len(self.chunks)):
+            if self._is_empty_slot(idx):
+                continue
+            chunk_position = self.index_to_chunk_position(idx)
+            result[
+                chunk_position.x * Chunk.X_SIZE:(chunk_position.x + 1) * Chunk.X_SIZE,
+                chunk_position.z * Chunk.Z_SIZE:(chunk_position.z + 1) * Chunk.Z_SIZE
+            ] = get_plane(self.chunks[idx])
+        return result
+
+    def _non_empty_chunk_bounds(self) -> tuple[Position, Position] | None:
+        """The minimum and maximum chunk positions of the non-empty chunks, ``None`` if all chunks are empty."""
+        chunk_positions = [
+            self.index_to_chunk_position(idx) for idx in range(len(self.chunks)) if not self._is_empty_slot(idx)
+        ]
+        if not chunk_positions:
+            return None
+        xs = [position.x for position in chunk_positions]
+        zs = [position.z for position in chunk_positions]
+        return Position(x=min(xs), y=0, z=min(zs)), Position(x=max(xs), y=0, z=max(zs))
+
+    def heightmap(self) -> np.ndarray:
+        """The y coordinate of the highest non-air block of each column, indexed by [x, z], -1 for empty columns."""
+        return self._stitch_chunk_planes(lambda chunk: chunk.heightmap, -1, np.int16)
+
+    def find_blocks(self, block_id: BlockID, block_meta: int = None) -> np.ndarray:
+        """
+        Get the positions of all blocks with ``block_id`` (and ``block_meta`` if given) as rows of (x, y, z).
+        Chunks that do not contain ``block_id`` are skipped using their block id index.
+        """
+        positions = [np.empty((0, 3), np.int32)]
+        for idx in range(len(self.chunks)):
+            if self._is_empty_slot(idx):
+                continue
+            chunk = self.chunks[idx]
+            if not chunk.block_counts[block_id]:
+                continue
+            chunk_position = self.index_to_chunk_position(idx)
+            positions.append(
+                chunk.find_blocks(block_id, block_meta)
+                + np.array([chunk_position.x * Chunk.X_SIZE, 0, chunk_position.z * Chunk.Z_SIZE], np.int32)
+            )
+        return np.concatenate(positions)
+
+    def chunk_hashes(self) -> list[str | None]:
+        """The content hash of each chunk (see ``Chunk.content_hash``), ``None`` for empty slots."""
+        return [
+            None if self._is_empty_slot(idx) else self.chunks[idx].content_hash() for idx in range(len(self.chunks))
+        ]
+
+    def diff(self, other: World) -> WorldDiff:
+        """
+        Compare the world with ``other`` by the content hashes of their chunks.
+        Only chunks whose hashes differ are compared block by block.
+        """
+        hashes, other_hashes = self.chunk_hashes(), other.chunk_hashes()
+        world_diff = WorldDiff(changed=[], added=[], removed=[], block_changes={})
+        for idx, (chunk_hash, other_chunk_hash) in enumerate(zip(hashes, other_hashes)):
+            if chunk_hash == other_chunk_hash:
+                continue
+            if chunk_hash is None:
+                world_diff.added.append(idx)
+            elif other_chunk_hash is None:
+                world_diff.removed.append(idx)
+            else:
+                world_diff.changed.append(idx)
+                world_diff.block_changes[idx] = self.chunks[idx].changed_block_indices(other.chunks[idx])
+        return world_diff
+
+    def make_patch(self, other: World) -> WorldPatch:
+        """Create a patch that turns this world into ``other``."""
+        world_diff = self.diff(other)
+        patch = WorldPatch(removed=world_diff.removed, payloads={}, deltas={}, base_hashes={})
+        for idx in world_diff.added:
+            patch.payloads[idx] = other.chunks[idx].payload()
+        for idx in world_diff.changed + world_diff.removed:
+            patch.base_hashes[idx] = self.chunks[idx].content_hash()
+        for idx in world_diff.changed:
+            payload, other_payload = self.chunks[idx].payload(), other.chunks[idx].payload()
+            if len(payload) != len(other_payload):
+                patch.payloads[idx] = other_payload
+                continue
+            offsets = np.flatnonzero(payload != other_payload).astype(np.uint32)
+            patch.deltas[idx] = (offsets, other_payload[offsets])
+        return patch
+
+    def top_blocks(self) -> tuple[np.ndarray, np.ndarray]:
+        """The id and meta value of the highest non-air block of each column, indexed by [x, z]."""
+        return (
+            self._stitch_chunk_planes(lambda chunk: chunk.top_block_ids, BlockIDs.AIR, np.uint8),
+            self._stitch_chunk_planes(lambda chunk: chunk.top_block_meta, 0, np.uint8)
+        )
+
+    def _region_slabs(
+            self, min_position: Position, max_position: Position
+    ) -> Iterable[tuple[int, tuple[slice, slice, slice], tuple[slice, slice, slice]]]:
+        """
+        Split a region into (chunk index, slices inside the chunk, slices inside the region) per chunk slot,
+        including empty slots.
+        """
+        world_size = self.MAX_CHUNKS_PER_DIRECTION * Chunk.X_SIZE
+        if not all(
+                0 <= position.x < world_size and 0 <= position.y < Chunk.Y_SIZE and 0 <= position.z < world_size
+                for position in (min_position, max_position)
+        ):
+            raise ValueError(f'Region must be inside the world! {min_position} {max_position}')
+        if not (min_position.x <= max_position.x and min_position.y <= max_position.y
+                and min_position.z <= max_position.z):
+            raise ValueError(f'Region minimum must not be greater than its maximum! {min_position} {max_position}')
+        y_slices = slice(min_position.y, max_position.y + 1), slice(0, max_position.y + 1 - min_position.y)
+        for chunk_x in range(min_position.x // Chunk.X_SIZE, max_position.x // Chunk.X_SIZE + 1):
+            x_start = max(min_position.x, chunk_x * Chunk.X_SIZE)
+            x_stop = min(max_position.x + 1, (chunk_x + 1) * Chunk.X_SIZE)
+            for chunk_z in range(min_position.z // Chunk.Z_SIZE, max_position.z // Chunk.Z_SIZE + 1):
+                z_start = max(min_position.z, chunk_z * Chunk.Z_SIZE)
+                z_stop = min(max_position.z + 1, (chunk_z + 1) * Chunk.Z_SIZE)
+                yield (
+                    self.chunk_position_to_index(Position(x=chunk_x, y=0, z=chunk_z)),
+                    (
+                        slice(x_start - chunk_x * Chunk.X_SIZE, x_stop - chunk_x * Chunk.X_SIZE),
+                        slice(z_start - chunk_z * Chunk.Z_SIZE, z_stop - chunk_z * Chunk.Z_SIZE),
+                        y_slices[0]
+                    ),
+                    (
+                        slice(x_start - min_position.x, x_stop - min_position.x),
+                        slice(z_start - min_position.z, z_stop - min_position.z),
+                        y_slices[1]
+                    )
+                )
+
+    def _non_empty_region_slabs(
+            self, min_position: Position, max_position: Position
+    ) -> list[tuple[int, tuple[slice, slice, slice], tuple[slice, slice, slice]]]:
+        """Split a region like ``_region_slabs``, raising before anything is written if it overlaps empty slots."""
+        slabs = list(self._region_slabs(min_position, max_position))
+        for idx, _, _ in slabs:
+            if self._is_empty_slot(idx):
+                raise ValueError(
+                    f'Region must not overlap empty chunks! {min_position} {max_position} '
+                    f'(chunk {self.index_to_chunk_position(idx)})'
+                )
+        return slabs
+
+    def get_region(self, min_position: Position, max_position: Position,
+                   planes: Iterable[str] = Chunk.PLANES) -> dict[str, np.ndarray]:
+        """
+        Get the blocks between ``min_position`` and ``max_position`` (inclusive).
+        Returns a dense array per chunk plane name in ``planes`` (see ``Chunk.PLANES``),
+        indexed by [x, z, y] relative to ``min_position``. Blocks in empty chunk slots are air without light.
+        """
+        shape = (
+            max_position.x + 1 - min_position.x,
+            max_position.z + 1 - min_position.z,
+            max_position.y + 1 - min_position.y
+        )
+        region = {name: np.zeros(shape, np.uint8) for name in planes}
+        for idx, chunk_slices, region_slices in self._region_slabs(min_position, max_position):
+            if self._is_empty_slot(idx):
+                continue
+            chunk = self.chunks[idx]
+            for name in region:
+                region[name][region_slices] = chunk.get_plane(name)[chunk_slices]
+        return region
+
+    def fill(self, min_position: Position, max_position: Position, block_id: BlockID, block_meta: int = None) -> None:
+        """
+        Set all blocks between ``min_position`` and ``max_position`` (inclusive) to ``block_id``.
+        The region must not overlap empty chunk slots.
+        """
+        for idx, chunk_slices, region_slices in self._non_empty_region_slabs(min_position, max_position):
+            chunk = self._mark_changed(idx)
+            chunk.set_plane('block_ids', block_id, chunk_slices)
+            if block_meta is not None:
+                chunk.set_plane('block_meta', block_meta, chunk_slices)
+
+    def set_region(self, origin: Position, region: dict[str, np.ndarray]) -> None:
+        """
+        Write dense arrays as returned by ``get_region`` into the world, starting at ``origin``.
+        Only the planes present in ``region`` are written. The region must not overlap empty chunk slots.
+        """
+        size_x, size_z, size_y = next(iter(region.values())).shape
+        max_position = Position(x=origin.x + size_x - 1, y=origin.y + size_y - 1, z=origin.z + size_z - 1)
+        for idx, chunk_slices, region_slices in self._non_empty_region_slabs(origin, max_position):
+            chunk = self._mark_changed(idx)
+            for name, values in region.items():
+                chunk.set_plane(name, values[region_slices], chunk_slices)
+
+    def _relight(self, plane: str, compute_light: Callable[[np.ndarray], np.ndarray]) -> None:
+        """
+        Compute a light plane over the bounding box of the non-empty chunks, with empty chunk slots as air,
+        and write it to the non-empty chunks.
+        """
+        bounds = self._non_empty_chunk_bounds()
+        if bounds is None:
+            return
+        min_position = Position(x=bounds[0].x * Chunk.X_SIZE, y=0, z=bounds[0].z * Chunk.Z_SIZE)
+        max_position = Position(
+            x=(bounds[1].x + 1) * Chunk.X_SIZE - 1, y=Chunk.Y_SIZE - 1, z=(bounds[1].z + 1) * Chunk.Z_SIZE - 1
+        )
+        light = compute_light(self.get_region(min_position, max_position, planes=('block_ids',))['block_ids'])
+        for idx, chunk_slices, region_slices in self._region_slabs(min_position, max_position):
+            if self._is_empty_slot(idx):
+                continue
+            self._mark_changed(idx).set_plane(plane, light[region_slices], chunk_slices)
+
+    def relight_sky(self) -> None:
+        """Compute the sky light of all blocks, letting light spread across chunk borders."""
+        self._relight('sky_light', compute_sky_light)
+
+    def relight_block_light(self) -> None:
+        """
+        Compute the block light of all blocks from the light emitting blocks, across chunk borders.
+        ``update_block`` keeps block light up to date by itself, this is meant for bulk changes like ``fill``.
+        """
+        self._relight('block_light', compute_block_light)
 
     def get_chunk(self, absolute_chunk_position: Position) -> Chunk:
         return self.chunks[self.chunk_position_to_index(absolute_chunk_position)]
 
     def set_chunk(self, absolute_chunk_position: Position, chunk: Chunk) -> None:
         chunk.position = absolute_chunk_position
-        self.chunks[self.chunk_position_to_index(absolute_chunk_position)] = chunk
+        idx = self.chunk_position_to_index(absolute_chunk_position)
+        self.chunks[idx] = chunk
+        self._mark_changed(idx)
+
+    def to_columns(self) -> dict[str, np.ndarray]:
+        """
+        Export the world as dense arrays.
+        Returns an array per chunk plane name (see ``Chunk.PLANES``) with one value per block,
+        indexed by [chunk x, chunk z, x, z, y], the biome data of each chunk indexed by [chunk x, chunk z]
+        and a ``non_empty`` mask of the chunks indexed by [chunk x, chunk z].
+        """
+        size = self.MAX_CHUNKS_PER_DIRECTION
+        columns = {
+            name: np.zeros((size, size, Chunk.X_SIZE, Chunk.Z_SIZE, Chunk.Y_SIZE), np.uint8)
+            for name in Chunk.PLANES
+        }
+        non_empty = np.zeros((size, size), bool)
+        biomes = {}
+        for idx in range(len(self.chunks)):
+            if self._is_empty_slot(idx):
+                continue
+            chunk = self.chunks[idx]
+            chunk_position = self.index_to_chunk_position(idx)
+            for name in Chunk.PLANES:
+                columns[name][chunk_position.x, chunk_position.z] = chunk.get_plane(name)
+            non_empty[chunk_position.x, chunk_position.z] = True
+            biomes[chunk_position.x, chunk_position.z] = chunk.biomes
+
+        biome_sizes = {len(chunk_biomes) for chunk_biomes in biomes.values()}
+        if len(biome_sizes) > 1:
+            raise ValueError(f'All chunks must have the same amount of biome data! {sorted(biome_sizes)}')
+        columns['biomes'] = np.zeros(
+            (size, size, biome_sizes.pop() if biome_sizes else Chunk.X_SIZE * Chunk.Z_SIZE), np.uint8
+        )
+        for (chunk_x, chunk_z), chunk_biomes in biomes.items():
+            columns['biomes'][chunk_x, chunk_z] = chunk_biomes
+        columns['non_empty'] = non_empty
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray]) -> World:
+        """
+        Create a world from dense arrays as returned by ``to_columns``.
+        The block ids and biomes of the chunks are views into the given arrays.
+        """
+        block_ids = columns['block_ids']
+        nibble_planes = {name: columns[name] for name in Chunk.PLANES if name != 'block_ids'}
+        biomes = columns['biomes']
+        non_empty = columns['non_empty']
+
+        chunks = []
+        for idx in range(cls.MAX_CHUNKS_PER_DIRECTION ** 2):
+            chunk_position = cls.index_to_chunk_position(idx)
+            if not non_empty[chunk_position.x, chunk_position.z]:
+                chunks.append(EmptyChunk())
+                continue
+            chunks.append(Chunk(
+                block_ids=block_ids[chunk_position.x, chunk_position.z].reshape(-1),
+                block_meta=pack_nibbles(nibble_planes['block_meta'][chunk_position.x, chunk_position.z].reshape(-1)),
+                sky_light=pack_nibbles(nibble_planes['sky_light'][chunk_position.x, chunk_position.z].reshape(-1)),
+                block_light=pack_nibbles(
+                    nibble_planes['block_light'][chunk_position.x, chunk_position.z].reshape(-1)
+                ),
+                biomes=biomes[chunk_position.x, chunk_position.z],
+                position=chunk_position
+            ))
+        return cls(chunks=chunks)
+
+    def export_npz(self, path: PathLike | str, compressed: bool = False) -> None:
+        """Save the arrays of ``to_columns`` to a ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(exist_ok=True)
+        (np.savez_compressed if compressed else np.savez)(path, **self.to_columns())
+
+    @classmethod
+    def from_npz(cls, path: PathLike | str) -> World:
+        """Create a world from a ``.npz`` file created by ``export_npz``."""
+        with np.load(Path(path)) as columns:
+            return cls.from_columns({name: columns[name] for name in columns.files})
 
     @classmethod
     def new(cls) -> World:  # TODO
         return cls(chunks=[EmptyChunk()])
 
     def possible_position(self, absolute_position: Position) -> bool:
-        return all((
-            0 <= absolute_position.x < Chunk.X_SIZE * self.chunks_per_direction,
-            0 <= absolute_position.y < Chunk.Y_SIZE,
-            0 <= absolute_position.z < Chunk.Z_SIZE * self.chunks_per_direction
-        ))
+        """Whether the position is inside the world and inside a chunk that is not empty."""
+        try:
+            idx, _ = self._block_index(absolute_position.x, absolute_position.y, absolute_position.z)
+        except ValueError:
+            return False
+        return not self._is_empty_slot(idx)
+
+
+@dataclass(repr=False)
+class WorldDiff:
+    """The differences between two worlds by chunk index, as returned by ``World.diff``."""
+
+    changed: list[int]
+    """The indices of the chunks whose content differs."""
+
+    added: list[int]
+    """The indices of the chunks that are only present in the other world."""
+
+    removed: list[int]
+    """The indices of the chunks that are only present in this world."""
+
+    block_changes: dict[int, np.ndarray]
+    """The indices of the blocks whose id, meta or light differ, per changed chunk."""
+
+    __slots__ = ('changed', 'added', 'removed', 'block_changes')
+
+    def __repr__(self):
+        return (
+            f'<WorldDiff changed={len(self.changed)} added={len(self.added)} removed={len(self.removed)} '
+            f'changed_blocks={sum(len(indices) for indices in self.block_changes.values())}>'
+        )
+
+    def __bool__(self):
+        return bool(self.changed or self.added or self.removed)
+
+    def changed_block_positions(self) -> np.ndarray:
+        """Get the positions in the world of all changed blocks of the changed chunks as rows of (x, y, z)."""
+        positions = [np.empty((0, 3), np.int32)]
+        for idx, indices in self.block_changes.items():
+            chunk_position = World.index_to_chunk_position(idx)
+            x, z, y = np.unravel_index(indices, (Chunk.X_SIZE, Chunk.Z_SIZE, Chunk.Y_SIZE))
+            positions.append(
+                np.stack((x, y, z), axis=1).astype(np.int32)
+                + np.array([chunk_position.x * Chunk.X_SIZE, 0, chunk_position.z * Chunk.Z_SIZE], np.int32)
+            )
+        return np.concatenate(positions)
+
+
+@dataclass(repr=False)
+class WorldPatch:
+    """
+    The changes that turn one world into another, as created by ``World.make_patch``.
+    Changed chunks are stored as the differing bytes of their payload, added chunks with their full payload.
+    A patch can be applied to a world or directly to a ``chunks.dat`` file
+    and is saved as a compressed ``.npz`` file.
+    """
+
+    removed: list[int]
+    """The indices of the chunks that are removed."""
+
+    payloads: dict[int, np.ndarray]
+    """The full payloads of added chunks and of changed chunks whose payload size changed, per chunk index."""
+
+    deltas: dict[int, tuple[np.ndarray, np.ndarray]]
+    """The offsets and new values of the changed bytes of the payloads of changed chunks, per chunk index."""
+
+    base_hashes: dict[int, str]
+    """The content hashes of the changed and removed chunks before the patch is applied, per chunk index."""
+
+    __slots__ = ('removed', 'payloads', 'deltas', 'base_hashes')
+
+    def __repr__(self):
+        return (
+            f'<WorldPatch removed={len(self.removed)} payloads={len(self.payloads)} deltas={len(self.deltas)} '
+            f'changed_bytes={sum(len(offsets) for offsets, _ in self.deltas.values())}>'
+        )
+
+    def apply(self, world: World) -> None:
+        """Apply the patch to ``world``, raises a ``ValueError`` if a chunk does not match the patched world."""
+        for idx, base_hash in self.base_hashes.items():
+            if world._is_empty_slot(idx) or world.chunks[idx].content_hash() != base_hash:
+                raise ValueError(f'Chunk {idx} does not match the chunk the patch was created from!')
+        for idx in self.removed:
+            world.set_chunk(World.index_to_chunk_position(idx), EmptyChunk())
+        for idx, payload in self.payloads.items():
+            world.set_chunk(World.index_to_chunk_position(idx), Chunk.from_bytes(payload.copy()))
+        for idx, (offsets, values) in self.deltas.items():
+            payload = world.chunks[idx].payload()
+            payload[offsets] = values
+            world.set_chunk(World.index_to_chunk_position(idx), Chunk.from_bytes(payload))
+
+    def apply_to_file(self, path: PathLike | str) -> None:
+        """
+        Apply the patch to a ``chunks.dat`` file.
+        Only the patched chunks are decoded and written back into the file (see ``World.save``).
+        """
+        world = World.load(path, lazy=True)
+        self.apply(world)
+        world.save(path, incremental=True)
+
+    def save(self, path: PathLike | str) -> None:
+        """Save the patch to a compressed ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(exist_ok=True)
+        arrays = {
+            'removed': np.array(self.removed, np.uint16),
+            'base_indices': np.array(list(self.base_hashes), np.uint16),
+            'base_hashes': np.array(list(self.base_hashes.values()), 'S32'),
+        }
+        for idx, payload in self.payloads.items():
+            arrays[f'payload_{idx}'] = payload
+        for idx, (offsets, values) in self.deltas.items():
+            arrays[f'offsets_{idx}'] = offsets
+            arrays[f'values_{idx}'] = values
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: PathLike | str) -> WorldPatch:
+        """Load a patch saved with ``save``."""
+        with np.load(Path(path)) as arrays:
+            patch = cls(
+                removed=arrays['removed'].tolist(),
+                payloads={},
+                deltas={},
+                base_hashes=dict(zip(arrays['base_indices'].tolist(), arrays['base_hashes'].astype(str).tolist()))
+            )
+            for name in arrays.files:
+                kind, _, idx = name.partition('_')
+                if kind == 'payload':
+                    patch.payloads[int(idx)] = arrays[name]
+                elif kind == 'offsets':
+                    patch.deltas[int(idx)] = (arrays[name], arrays[f'values_{idx}'])
+        return patch
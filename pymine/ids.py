@@ -273,6 +273,16 @@ TRANSPARENT_BLOCKS = {
     BlockIDs.FENCE_GATE,
 }
 
+LIGHT_EMITTING_BLOCKS = {
+    BlockIDs.LAVA: 15,
+    BlockIDs.LAVA_SOURCE: 15,
+    BlockIDs.FIRE: 15,
+    BlockIDs.TORCH: 14,
+    BlockIDs.BURNING_FURNACE: 13,
+    BlockIDs.GLOWING_REDSTONE_ORE: 9,
+    BlockIDs.BROWN_MUSHROOM: 1,
+}
+
 FULL_BLOCKS = {
     BlockIDs.STONE,
     BlockIDs.GRASS_BLOCK,
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from .ids import BlockID, TRANSPARENT_BLOCKS, LIGHT_EMITTING_BLOCKS
+
+if TYPE_CHECKING:
+    from .chunks import Chunk, World
+
+
+MAX_LIGHT = 15
+"""The highest light level."""
+
+TRANSPARENCY = np.zeros(256, bool)
+"""Whether light passes through a block, indexed by block id."""
+TRANSPARENCY[list(TRANSPARENT_BLOCKS)] = True
+
+LIGHT_EMISSION = np.zeros(256, np.uint8)
+"""The light level emitted by a block, indexed by block id."""
+LIGHT_EMISSION[list(LIGHT_EMITTING_BLOCKS)] = list(LIGHT_EMITTING_BLOCKS.values())
+
+
+def _max_of_neighbours(light: np.ndarray) -> np.ndarray:
+    """Get the highest light level of the six neighbours of each block of an array indexed by [x, z, y]."""
+    neighbours = np.zeros_like(light)
+    for axis in range(3):
+        lower = [slice(None)] * 3
+        upper = [slice(None)] * 3
+        lower[axis] = slice(None, -1)
+        upper[axis] = slice(1, None)
+        np.maximum(neighbours[tuple(upper)], light[tuple(lower)], out=neighbours[tuple(upper)])
+        np.maximum(neighbours[tuple(lower)], light[tuple(upper)], out=neighbours[tuple(lower)])
+    return neighbours
+
+
+def diffuse_light(light: np.ndarray, transparent: np.ndarray) -> np.ndarray:
+    """
+    Spread light to neighbouring transparent blocks, losing one level per block, until it no longer changes.
+    Blocks that are not transparent keep their light level.
+    Both arrays are indexed by [x, z, y].
+    """
+    opaque = ~transparent
+    for _ in range(MAX_LIGHT - 1):
+        spread = _max_of_neighbours(light)
+        np.subtract(spread, 1, out=spread, where=spread > 0)
+        np.maximum(spread, light, out=spread)
+        spread[opaque] = light[opaque]
+        if np.array_equal(spread, light):
+            break
+        light = spread
+    return light
+
+
+def compute_sky_light(block_ids: np.ndarray) -> np.ndarray:
+    """
+    Compute the sky light of blocks indexed by [x, z, y].
+    Sky light shines down columns of transparent blocks at full strength and then spreads sideways and downwards,
+    losing one level per block. Blocks that are not transparent get no sky light.
+    """
+    transparent = TRANSPARENCY[block_ids]
+    open_sky = np.flip(np.logical_and.accumulate(np.flip(transparent, axis=2), axis=2), axis=2)
+    light = np.where(open_sky, MAX_LIGHT, 0).astype(np.uint8)
+
+    # Above the highest solid block every block sees the sky, only the blocks below need to be diffused
+    solid_layers = np.flatnonzero(~transparent.all(axis=(0, 1)))
+    if not len(solid_layers):
+        return light
+    top = min(int(solid_layers[-1]) + 2, light.shape[2])
+    light[:, :, :top] = diffuse_light(light[:, :, :top], transparent[:, :, :top])
+    return light
+
+
+def compute_block_light(block_ids: np.ndarray) -> np.ndarray:
+    """
+    Compute the block light of blocks indexed by [x, z, y].
+    Light emitting blocks keep their light level and light spreads to transparent blocks, losing one level per block.
+    """
+    light = LIGHT_EMISSION[block_ids]
+    if not light.any():
+        return light
+    return diffuse_light(light, TRANSPARENCY[block_ids])
+
+
+def affects_block_light(old_block_id: BlockID, block_id: BlockID) -> bool:
+    """Whether replacing ``old_block_id`` with ``block_id`` can change the block light around it."""
+    return bool(
+        LIGHT_EMISSION[old_block_id] != LIGHT_EMISSION[block_id]
+        or TRANSPARENCY[old_block_id] != TRANSPARENCY[block_id]
+    )
+
+
+def update_block_light(world: World, x: int, y: int, z: int) -> None:
+    """
+    Update the block light around the block at (x, y, z) of ``world`` after the block was changed.
+    Light is first removed and then added back with breadth-first searches starting at the changed block,
+    so only blocks whose light level can change are visited, across chunk borders.
+    """
+    chunks = {}
+    changed_chunks = set()
+
+    def locate(bx: int, by: int, bz: int) -> tuple[Chunk, int] | None:
+        try:
+            idx, block_idx = world._block_index(bx, by, bz)
+        except ValueError:
+            return None
+        if idx not in chunks:
+            chunks[idx] = None if world._is_empty_slot(idx) else world.chunks[idx]
+        if chunks[idx] is None:
+            return None
+        return chunks[idx], block_idx
+
+    def get_light(located: tuple[Chunk, int]) -> int:
+        chunk, block_idx = located
+        return chunk._get_nibble(chunk.block_light, block_idx)
+
+    def set_light(located: tuple[Chunk, int], level: int) -> None:
+        chunk, block_idx = located
+        idx = world.chunk_position_to_index(chunk.position)
+        if idx not in changed_chunks:
+            # ``chunks`` keeps the chunk alive, so this pins the same chunk of a lazily loaded world
+            world._mark_changed(idx)
+            chunk._ensure_writable()
+            changed_chunks.add(idx)
+        chunk._set_nibble(chunk.block_light, block_idx, level)
+
+    def neighbours(bx: int, by: int, bz: int) -> Iterable[tuple[int, int, int]]:
+        return (
+            (bx + 1, by, bz), (bx - 1, by, bz), (bx, by + 1, bz), (bx, by - 1, bz), (bx, by, bz + 1), (bx, by, bz - 1)
+        )
+
+    located = locate(x, y, z)
+    if located is None:
+        return
+    chunk, block_idx = located
+    block_id = int(chunk.block_ids[block_idx])
+
+    to_remove = deque()
+    to_add = deque()
+    old_level = get_light(located)
+    if old_level:
+        set_light(located, 0)
+        to_remove.append((x, y, z, old_level))
+    while to_remove:
+        bx, by, bz, level = to_remove.popleft()
+        for position in neighbours(bx, by, bz):
+            neighbour = locate(*position)
+            if neighbour is None:
+                continue
+            neighbour_level = get_light(neighbour)
+            if not neighbour_level:
+                continue
+            if neighbour_level < level:
+                set_light(neighbour, 0)
+                to_remove.append((*position, neighbour_level))
+                emission = int(LIGHT_EMISSION[neighbour[0].block_ids[neighbour[1]]])
+                if emission:
+                    set_light(neighbour, emission)
+                    to_add.append(position)
+            else:
+                to_add.append(position)
+
+    emission = int(LIGHT_EMISSION[block_id])
+    if emission:
+        set_light(located, emission)
+        to_add.append((x, y, z))
+    if TRANSPARENCY[block_id]:
+        to_add.extend(neighbours(x, y, z))
+
+    while to_add:
+        position = to_add.popleft()
+        source = locate(*position)
+        if source is None:
+            continue
+        level = get_light(source) - 1
+        if level <= 0:
+            continue
+        for neighbour_position in neighbours(*position):
+            neighbour = locate(*neighbour_position)
+            if neighbour is None or not TRANSPARENCY[neighbour[0].block_ids[neighbour[1]]]:
+                continue
+            if get_light(neighbour) < level:
+                set_light(neighbour, level)
+                to_add.append(neighbour_position)
@@ -1,17 +1,70 @@
+import json
 import logging
-from typing import Literal
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Iterable, Literal
 
+import numpy as np
 from PIL import Image
 
-from .chunks import World, Block
+from .chunks import World, Chunk, Block, Position
 from .ids import BlockID, BlockIDs
+from .lighting import TRANSPARENCY
 
 
 Face = Literal['top', 'bottom', 'front', 'back', 'left', 'right']
+FACES: tuple[Face, ...] = ('top', 'bottom', 'front', 'back', 'left', 'right')
+
+
+FENCE_NORTH = 0b0001
+FENCE_SOUTH = 0b0010
+FENCE_WEST = 0b0100
+FENCE_EAST = 0b1000
+
+TILE_INVISIBLE = -1
+"""Marks an invisible face in ``TextureMapper.texture_table``."""
+TILE_MISSING = -2
+"""Marks a face without a texture in ``TextureMapper.texture_table``."""
+TILE_HANDLER = -3
+"""Marks a face whose texture is created by a handler in ``TextureMapper.texture_table``."""
+
+
+def _render_tile_batch(path: str, out_dir: str, chunk_positions: list[tuple[int, int]]) -> int:
+    """Render the tiles of a batch of chunks of the world at ``path`` and write them, runs in a worker process."""
+    mapper = TextureMapper(World.load(path, lazy=True, cache_size=64, memory_map=True))
+    for chunk_x, chunk_z in chunk_positions:
+        mapper._write_chunk_tile(Path(out_dir), Position(x=chunk_x, y=0, z=chunk_z))
+    return len(chunk_positions)
+
+
+def _combine_tile_batch(out_dir: str, zoom: int, tiles: list[tuple[int, int]]) -> int:
+    """Combine the tiles of the zoom level above into a batch of tiles of ``zoom``, runs in a worker process."""
+    for tile_x, tile_z in tiles:
+        TextureMapper._combine_tile(Path(out_dir), zoom, tile_x, tile_z)
+    return len(tiles)
 
 
 class TextureMapper:
+    """
+    Maps the faces of blocks to textures from the terrain atlas.
+
+    The textures of all blocks are compiled into ``texture_table`` when the mapper is created,
+    so the texture of a face is a single lookup.
+    Atlas tiles are cropped once. Textures created by a handler (slabs, stairs, fences, torches ...) are cached by
+    (block id, meta, face), fences additionally by the mask of their connections to neighbouring blocks.
+    Transparent blocks composited over the block below them are cached by the two textures.
+    Returned textures are shared and must not be modified.
+    """
+
     TEXTURE_SIZE: int = 16
+    TILE_SIZE: int = TEXTURE_SIZE * Chunk.X_SIZE
+    """The width and height of a map tile in pixels, a tile of the highest zoom level shows one chunk."""
+    MAX_ZOOM: int = World.MAX_CHUNKS_PER_DIRECTION.bit_length() - 1
+    """The zoom level with one tile per chunk, zoom level 0 has one tile for the whole world."""
+    TILE_MANIFEST: str = 'tiles.json'
+    """The file in the tile directory that records the content each chunk tile was rendered from."""
 
     INVISIBLE: Image.Image
     DOES_NOT_EXIST: Image.Image
@@ -19,27 +72,66 @@ class TextureMapper:
     terrain_atlas: Image.Image
     world: World
 
+    texture_table: np.ndarray
+    """
+    The atlas tile index of every face of every block indexed by [block id, meta, face index (see ``FACES``)],
+    or one of ``TILE_INVISIBLE``, ``TILE_MISSING`` and ``TILE_HANDLER``.
+    """
+
+    texture_cache_hits: int
+    """The number of textures that were taken from the texture cache."""
+
+    texture_cache_misses: int
+    """The number of textures that were not in the texture cache and had to be created."""
+
     def __init__(self, world: World):
         self.world = world
         self.terrain_atlas = Image.open('terrain-atlas.tga')
+        rgba_atlas = self.terrain_atlas.convert('RGBA')
+        self._atlas_tiles = [
+            rgba_atlas.crop((
+                self.TEXTURE_SIZE * x,
+                self.TEXTURE_SIZE * y,
+                self.TEXTURE_SIZE * x + self.TEXTURE_SIZE,
+                self.TEXTURE_SIZE * y + self.TEXTURE_SIZE
+            ))
+            for y in range(self.terrain_atlas.height // self.TEXTURE_SIZE)
+            for x in range(self.terrain_atlas.width // self.TEXTURE_SIZE)
+        ]
+        self._texture_cache: dict[tuple[int, int, Face, int], Image.Image] = {}
+        self._composite_cache: dict[tuple[int, int], Image.Image] = {}
+        self.texture_cache_hits = 0
+        self.texture_cache_misses = 0
         self.INVISIBLE = Image.new('RGBA', (self.TEXTURE_SIZE, self.TEXTURE_SIZE), (0, 0, 0, 0))
         self.DOES_NOT_EXIST = self._from_atlas_coord(0, 0)
         self.MISSING = Image.new('RGBA', (self.TEXTURE_SIZE, self.TEXTURE_SIZE), (255, 0, 255, 255))
+        self.texture_table = self._compile_texture_table()
+        self._texture_handlers: dict[BlockID, Callable[[Block, Face], Image.Image]] = {
+            BlockIDs.BED: self._bed,
+            BlockIDs.STONE_SLAB: lambda block, face: self._slab(block, face, self._from_atlas_coord(27, 0)),
+            BlockIDs.TORCH: self._torch,
+            BlockIDs.WOODEN_STAIRS: lambda block, face: self._stair(
+                block, face, self._from_block(Block.from_id(BlockIDs.PLANK), face=face)
+            ),
+            BlockIDs.FARMLAND: self._farmland,
+            BlockIDs.COBBLESTONE_STAIRS: lambda block, face: self._stair(
+                block, face, self._from_block(Block.from_id(BlockIDs.COBBLESTONE), face=face)
+            ),
+            BlockIDs.SNOW: self._snow,
+        }
+
+    def clear_texture_cache(self) -> None:
+        """Remove all textures from the texture cache and reset its counters."""
+        self._texture_cache.clear()
+        self._composite_cache.clear()
+        self.texture_cache_hits = 0
+        self.texture_cache_misses = 0
 
     def _from_atlas_coord(self, x: int, y: int) -> Image.Image:
-        return self.terrain_atlas.crop((
-            self.TEXTURE_SIZE * x,
-            self.TEXTURE_SIZE * y,
-            self.TEXTURE_SIZE * x + self.TEXTURE_SIZE,
-            self.TEXTURE_SIZE * y + self.TEXTURE_SIZE
-        )).convert('RGBA')
+        return self._atlas_tiles[self._coord_to_index(x, y)]
 
     def _from_atlas_index(self, index: int) -> Image.Image:
-        items_per_row = self.terrain_atlas.width // self.TEXTURE_SIZE
-        return self._from_atlas_coord(
-            index % items_per_row,
-            index // items_per_row
-        )
+        return self._atlas_tiles[index]
 
     def _coord_to_index(self, x: int, y: int) -> int:
         items_per_row = self.terrain_atlas.width // self.TEXTURE_SIZE
@@ -50,6 +142,7 @@ class TextureMapper:
             return view
         logging.getLogger(__name__).debug(block)  # TODO remove
 
+        view = view.copy()
         view.paste(
             Image.new(
                 mode='RGBA',
@@ -65,6 +158,7 @@ class TextureMapper:
             return view
 
         logging.getLogger(__name__).debug(block)  # TODO remove
+        view = view.copy()
         view.paste(
             Image.new(
                 'RGBA',
@@ -87,392 +181,239 @@ class TextureMapper:
         )
         return view
 
-    def _map_texture(self, block: Block, face: Face) -> Image.Image:
-        if block.id == BlockIDs.AIR:
-            return self.INVISIBLE
-        if block.id == BlockIDs.STONE:
-            return self._from_atlas_coord(4, 0)
-        if block.id == BlockIDs.GRASS_BLOCK:
-            if face == 'top':
-                return self._from_atlas_coord(3, 0)
-            if face == 'bottom':
-                return self.bottom(Block.from_id(BlockIDs.DIRT))
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(1, 0) + block.meta)
-        if block.id == BlockIDs.DIRT:
-            return self._from_atlas_coord(21, 0)
-        if block.id == BlockIDs.COBBLESTONE:
-            return self._from_atlas_coord(5, 0)
-        if block.id == BlockIDs.PLANK:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(22, 0) + block.meta)
-        if block.id == BlockIDs.SAPLING:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(4, 1) + block.meta)
-        if block.id == BlockIDs.BEDROCK:
-            return self._from_atlas_coord(11, 0)
-        if block.id == BlockIDs.WATER:
-            return self._from_atlas_coord(0, 9)
-        if block.id == BlockIDs.WATER_SOURCE:
-            return self._from_atlas_coord(22, 7)
-        if block.id == BlockIDs.LAVA:
-            return self._from_atlas_coord(2, 9)
-        if block.id == BlockIDs.LAVA_SOURCE:
-            return self._from_atlas_coord(23, 7)
-        if block.id == BlockIDs.SAND:
-            return self._from_atlas_coord(14, 0)
-        if block.id == BlockIDs.GRAVEL:
-            return self._from_atlas_coord(20, 0)
-        if block.id == BlockIDs.GOLD_ORE:
-            return self._from_atlas_coord(0, 2)
-        if block.id == BlockIDs.IRON_ORE:
-            return self._from_atlas_coord(1, 2)
-        if block.id == BlockIDs.COAL_ORE:
-            return self._from_atlas_coord(2, 2)
-        if block.id == BlockIDs.LOG:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            if face in ('top', 'bottom'):
-                return self._from_atlas_index(self._coord_to_index(9, 1) + block.meta * 2)
-            return self._from_atlas_index(self._coord_to_index(8, 1) + block.meta * 2)
-        if block.id == BlockIDs.LEAVES:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(30, 2) + block.meta)
-        if block.id == BlockIDs.SPONGE:
-            return self._from_atlas_coord(24, 2)
-        if block.id == BlockIDs.GLASS:
-            return self._from_atlas_coord(25, 2)
-        if block.id == BlockIDs.LAPIS_LAZULI_ORE:
-            return self._from_atlas_coord(3, 2)
-        if block.id == BlockIDs.LAPIS_LAZULI_BLOCK:
-            return self._from_atlas_coord(20, 1)
-        if block.id == BlockIDs.BID_23:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.SANDSTONE:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            if face == 'top':
-                return self._from_atlas_coord(18, 0)
-            if face == 'bottom':
-                return self._from_atlas_coord(19, 0)
-            return self._from_atlas_index(self._coord_to_index(15, 0) + block.meta)
-        if block.id == BlockIDs.BID_25:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BED:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            if block.meta == 0:
-                if face == 'top':
-                    return self._from_atlas_coord(5, 5)
-                if face == 'front':
-                    return self._from_atlas_coord(6, 5)
-                if face == 'right':
-                    return self._from_atlas_coord(7, 5)
-                if face == 'left':
-                    return self._from_atlas_coord(7, 5).transform(
-                        (self.TEXTURE_SIZE, self.TEXTURE_SIZE),
-                        Image.FLIP_LEFT_RIGHT
-                    )
-                # no bottom, back?
-            if block.meta == 1:
-                if face == 'top':
-                    return self._from_atlas_coord(8, 5)
-                if face == 'back':
-                    return self._from_atlas_coord(9, 5)
-                if face == 'right':
-                    return self._from_atlas_coord(10, 5)
-                if face == 'left':
-                    return self._from_atlas_coord(10, 5).transform(
-                        (self.TEXTURE_SIZE, self.TEXTURE_SIZE),
-                        Image.FLIP_LEFT_RIGHT
-                    )
-                # no bottom, front?
-        if block.id == BlockIDs.POWERED_RAIL:
-            if face == 'top':
-                return self._from_atlas_coord(0, 5)
-        if block.id == BlockIDs.BID_28:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_29:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.COBWEB:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(1, 1)
-        if block.id in (BlockIDs.DEAD_SHRUB, BlockIDs.BEAD_BUSH):
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(9, 2)
-        if block.id == BlockIDs.BID_33:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_34:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.WOOL:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(24, 7) + block.meta)
-        if block.id == BlockIDs.BID_36:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.YELLOW_FLOWER:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(3, 1)
-        if block.id == BlockIDs.CYAN_FLOWER:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(2, 1)
-        if block.id == BlockIDs.BROWN_MUSHROOM:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(31, 0)
-        if block.id == BlockIDs.RED_MUSHROOM:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(30, 0)
-        if block.id == BlockIDs.GOLD_BLOCK:
-            return self._from_atlas_coord(17, 1)
-        if block.id == BlockIDs.IRON_BLOCK:
-            return self._from_atlas_coord(16, 1)
-        if block.id == BlockIDs.DOUBLE_STONE_SLAB:
-            if face in ('top', 'bottom'):
-                return self._from_atlas_coord(26, 0)
-            return self._from_atlas_coord(27, 0)
-        if block.id == BlockIDs.STONE_SLAB:
-            return self._slab(
-                block, face,
-                (
-                    self._from_atlas_index(self._coord_to_index(26, 0))
-                    if face in ('top', 'bottom')
-                    else self._from_atlas_index(self._coord_to_index(27, 0))
-                )
+    def _fence_connections(self, block: Block, world: World | None) -> int:
+        """Get the mask of the neighbouring blocks of ``world`` a fence connects to (``FENCE_NORTH`` | ...)."""
+        connections = 0
+        if world is None:
+            return connections
+        for mask, position in (
+                (FENCE_NORTH, block.position.north()),
+                (FENCE_SOUTH, block.position.south()),
+                (FENCE_WEST, block.position.west()),
+                (FENCE_EAST, block.position.east())
+        ):
+            if world.possible_position(position):
+                neighbour = world.get_block(position)
+                if neighbour.is_full_block or neighbour.id == block.id:
+                    connections |= mask
+        return connections
+
+    def _fence(self, face: Face, connections: int) -> Image.Image:
+        plank = self._from_block(Block.from_id(BlockIDs.PLANK), face=face)
+        view = self.INVISIBLE.copy()
+        view.paste(
+            plank.crop((
+                self.TEXTURE_SIZE // 2 - 2,
+                self.TEXTURE_SIZE // 2 - 2,
+                self.TEXTURE_SIZE // 2 + 2,
+                self.TEXTURE_SIZE // 2 + 2
+            )),
+            (self.TEXTURE_SIZE // 2 - 2, self.TEXTURE_SIZE // 2 - 2)
+        )
+        if connections & FENCE_NORTH:
+            view.paste(
+                plank.crop((0, 0, 1, self.TEXTURE_SIZE // 2)),
+                (0, self.TEXTURE_SIZE // 2 - 1)
             )
-        if block.id == BlockIDs.BRICK_BLOCK:
-            return self._from_atlas_coord(28, 0)
-        if block.id == BlockIDs.TNT:
-            if face == 'top':
-                return self._from_atlas_coord(30, 0)
-            if face == 'bottom':
-                return self._from_atlas_coord(31, 0)
-            return self._from_atlas_coord(29, 0)
-        if block.id == BlockIDs.BOOKSHELF:
-            if face in ('top', 'bottom'):
-                return self._from_block(Block.from_id(BlockIDs.PLANK), face=face)
-            return self._from_atlas_coord(0, 1)
-        if block.id == BlockIDs.MOSSY_COBBLESTONE:
-            return self._from_atlas_coord(6, 0)
-        if block.id == BlockIDs.OBSIDIAN:
-            return self._from_atlas_coord(12, 0)
-        if block.id == BlockIDs.TORCH:
-            if face == 'top':
-                view = self.INVISIBLE.copy()
-                view.paste(
-                    self._from_atlas_coord(18, 3).crop((7, 6, 9, 8)),
-                    (7, 6)
-                )
-                return view
-            if face == 'bottom':
-                view = self.INVISIBLE.copy()
-                view.paste(
-                    self._from_atlas_coord(18, 3).crop((7, 8, 9, 10)),
-                    (7, 8)
-                )
-                return view
-            return self._from_atlas_coord(18, 3)
-        if block.id == BlockIDs.FIRE:
-            return self.INVISIBLE
-        if block.id == BlockIDs.MOB_SPAWNER:
-            return self._from_atlas_coord(6, 3)
-        if block.id == BlockIDs.WOODEN_STAIRS:
-            return self._stair(
-                block,
-                face,
-                self._from_block(Block.from_id(BlockIDs.PLANK), face=face)
+        if connections & FENCE_SOUTH:
+            view.paste(
+                plank.crop((0, self.TEXTURE_SIZE // 2, 1, self.TEXTURE_SIZE)),
+                (self.TEXTURE_SIZE // 2, self.TEXTURE_SIZE // 2 - 1)
             )
-        if block.id == BlockIDs.CHEST:
-            if face == 'bottom':
-                return self._from_atlas_coord(18, 7)
-            if face == 'front':
-                return self._from_atlas_coord(20, 7)
-            return self._from_atlas_coord(19, 7)
-        if block.id == BlockIDs.BID_55:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.DIAMOND_ORE:
-            return self._from_atlas_coord(4, 2)
-        if block.id == BlockIDs.DIAMOND_BLOCK:
-            return self._from_atlas_coord(18, 1)
-        if block.id == BlockIDs.CRAFTING_TABLE:
-            if face == 'top':
-                return self._from_atlas_coord(13, 2)
-            if face == 'bottom':
-                return self._from_block(Block.from_id(BlockIDs.PLANK), face=face)
-            if face in ('left', 'right'):
-                return self._from_atlas_coord(14, 2)
-            return self._from_atlas_coord(15, 2)
-        if block.id == BlockIDs.WHEAT_SEEDS:
-            return self.INVISIBLE
-        if block.id == BlockIDs.FARMLAND:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            if face == 'top':
-                return self._from_atlas_index(self._coord_to_index(29, 3) - block.meta)
-            if face == 'bottom':
-                return self._from_block(Block.from_id(BlockIDs.DIRT), face=face)
-            transparent = self.INVISIBLE.copy().crop((0, 0, int(self.TEXTURE_SIZE * 0.1), int(self.TEXTURE_SIZE * 0.1)))
-            view = self._from_block(Block.from_id(BlockIDs.DIRT), face=face)
-            view.paste(transparent)
-            return view
-        if block.id == BlockIDs.FURNACE:
-            if face == 'front':
-                return self._from_atlas_index(self._coord_to_index(16, 2))
-            if face in ('top', 'bottom'):
-                return self._from_atlas_coord(18, 2)
-            return self._from_atlas_coord(19, 2)
-        if block.id == BlockIDs.BURNING_FURNACE:
-            if face == 'front':
-                return self._from_atlas_coord(17, 2)
-            return self._from_block(Block.from_id(BlockIDs.FURNACE), face=face)
-        if block.id == BlockIDs.SIGN_POST:
-            return self.INVISIBLE
-        if block.id == BlockIDs.WOODEN_DOOR:
-            return self.INVISIBLE
-        if block.id == BlockIDs.LADDER:
-            return self.INVISIBLE
-        if block.id == BlockIDs.RAIL:  # TODO rotation
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(29, 4) + block.meta)
-        if block.id == BlockIDs.COBBLESTONE_STAIRS:
-            return self._stair(
-                block,
-                face,
-                self._from_block(Block.from_id(BlockIDs.COBBLESTONE), face=face)
+        if connections & FENCE_WEST:
+            view.paste(
+                plank.crop((0, 0, self.TEXTURE_SIZE // 2, 1)),
+                (self.TEXTURE_SIZE // 2 - 1, 0)
             )
-        if block.id == BlockIDs.WALL_SIGN:
-            return self.INVISIBLE
-        if block.id == BlockIDs.BID_69:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_70:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.IRON_DOOR:
-            return self.INVISIBLE
-        if block.id == BlockIDs.BID_72:
-            return self.DOES_NOT_EXIST
-        if block.id in (BlockIDs.REDSTONE_ORE, BlockIDs.GLOWING_REDSTONE_ORE):
-            return self._from_atlas_coord(5, 2)
-        if block.id == BlockIDs.BID_75:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_76:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_77:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.SNOW:
-            if face in ('top', 'bottom'):
-                return self._from_atlas_coord(7, 3)
-            transparent = self.INVISIBLE.copy().crop((0, 0, int(self.TEXTURE_SIZE * 0.95), int(self.TEXTURE_SIZE * 0.95)))
-            view = self._from_atlas_coord(7, 3)
-            view.paste(transparent)
-            return view
-        if block.id == BlockIDs.ICE:
-            return self._from_atlas_coord(8, 3)
-        if block.id == BlockIDs.SNOW_BLOCK:
-            return self._from_atlas_coord(7, 3)
-        if block.id == BlockIDs.CACTUS:
-            if face == 'top':
-                return self._from_atlas_coord(9, 3)
-            if face == 'bottom':
-                return self._from_atlas_coord(11, 3)
-            return self._from_atlas_coord(10, 3)
-        if block.id == BlockIDs.CLAY_BLOCK:
-            return self._from_atlas_coord(13, 0)
-        if block.id == BlockIDs.SUGAR_CANE:
-            if face in ('top', 'bottom'):
-                return self.INVISIBLE
-            return self._from_atlas_coord(12, 3)
-        if block.id == BlockIDs.BID_84:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.FENCE:
-            view = self.INVISIBLE.copy()
+        if connections & FENCE_EAST:
             view.paste(
-                self._from_block(Block.from_id(BlockIDs.PLANK), face=face).crop((
-                    self.TEXTURE_SIZE // 2 - 2,
-                    self.TEXTURE_SIZE // 2 - 2,
-                    self.TEXTURE_SIZE // 2 + 2,
-                    self.TEXTURE_SIZE // 2 + 2
-                )),
-                (self.TEXTURE_SIZE // 2 - 2, self.TEXTURE_SIZE // 2 - 2)
+                plank.crop((self.TEXTURE_SIZE // 2, 0, self.TEXTURE_SIZE, 1)),
+                (self.TEXTURE_SIZE // 2 - 1, self.TEXTURE_SIZE // 2)
             )
-            if self.world is not None:
-                if self.world.possible_position(block.position.north()):
-                    north_block = self.world.get_block(block.position.north())
-                    if north_block.is_full_block or north_block.id == block.id:
-                        view.paste(
-                            self._from_block(Block.from_id(BlockIDs.PLANK), face=face).crop(
-                                (0, 0, 1, self.TEXTURE_SIZE // 2)
-                            ),
-                            (0, self.TEXTURE_SIZE // 2 - 1)
-                        )
-                if self.world.possible_position(block.position.south()):
-                    south_block = self.world.get_block(block.position.south())
-                    if south_block.is_full_block or south_block.id == block.id:
-                        view.paste(
-                            self._from_block(Block.from_id(BlockIDs.PLANK), face=face).crop(
-                                (0, self.TEXTURE_SIZE // 2, 1, self.TEXTURE_SIZE)
-                            ),
-                            (self.TEXTURE_SIZE // 2, self.TEXTURE_SIZE // 2 - 1)
-                        )
-                if self.world.possible_position(block.position.west()):
-                    west_block = self.world.get_block(block.position.west())
-                    if west_block.is_full_block or west_block.id == block.id:
-                        view.paste(
-                            self._from_block(Block.from_id(BlockIDs.PLANK), face=face).crop(
-                                (0, 0, self.TEXTURE_SIZE // 2, 1)
-                            ),
-                            (self.TEXTURE_SIZE // 2 - 1, 0)
-                        )
-                if self.world.possible_position(block.position.east()):
-                    east_block = self.world.get_block(block.position.east())
-                    if east_block.is_full_block or east_block.id == block.id:
-                        view.paste(
-                            self._from_block(Block.from_id(BlockIDs.PLANK), face=face).crop(
-                                (self.TEXTURE_SIZE // 2, 0, self.TEXTURE_SIZE, 1)
-                            ),
-                            (self.TEXTURE_SIZE // 2 - 1, self.TEXTURE_SIZE // 2)
-                        )
-            return view
-        if block.id == BlockIDs.BID_86:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.NETHERRACK:
-            return self._from_atlas_coord(11, 4)
-        if block.id == BlockIDs.BID_88:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_89:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_90:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_91:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_92:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_93:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_94:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_95:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.TRAPDOOR:
-            return self._from_atlas_coord(4, 4)
-        if block.id == BlockIDs.BID_97:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.STONE_BRICKS:
-            logging.getLogger(__name__).debug(block)  # TODO remove
-            return self._from_atlas_index(self._coord_to_index(7, 0) + block.meta)
-        if block.id == BlockIDs.BID_99:
-            return self.DOES_NOT_EXIST
-        if block.id == BlockIDs.BID_100:
-            return self.DOES_NOT_EXIST
-
-        return self.MISSING
+        return view
+
+    def _compile_texture_table(self) -> np.ndarray:
+        """Compile the textures of all blocks into a table indexed by [block id, meta, face index]."""
+        table = np.full((256, 16, len(FACES)), TILE_MISSING, np.int16)
+        tile = self._coord_to_index
+
+        def assign(block_ids: BlockID | tuple[BlockID, ...], default: int | Callable[[int], int],
+                   metas: Iterable[int] = range(16), **faces: int | Callable[[int], int]) -> None:
+            for block_id in block_ids if isinstance(block_ids, tuple) else (block_ids, ):
+                for meta in metas:
+                    for face_index, face in enumerate(FACES):
+                        value = faces.get(face, default)
+                        table[block_id, meta, face_index] = value(meta) if callable(value) else value
+
+        does_not_exist = tile(0, 0)
+        plank = tile(22, 0)
+        dirt = tile(21, 0)
+        assign(BlockIDs.AIR, TILE_INVISIBLE)
+        assign(BlockIDs.STONE, tile(4, 0))
+        assign(BlockIDs.GRASS_BLOCK, lambda meta: tile(1, 0) + meta, top=tile(3, 0), bottom=dirt)
+        assign(BlockIDs.DIRT, dirt)
+        assign(BlockIDs.COBBLESTONE, tile(5, 0))
+        assign(BlockIDs.PLANK, lambda meta: plank + meta)
+        assign(BlockIDs.SAPLING, lambda meta: tile(4, 1) + meta, top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.BEDROCK, tile(11, 0))
+        assign(BlockIDs.WATER, tile(0, 9))
+        assign(BlockIDs.WATER_SOURCE, tile(22, 7))
+        assign(BlockIDs.LAVA, tile(2, 9))
+        assign(BlockIDs.LAVA_SOURCE, tile(23, 7))
+        assign(BlockIDs.SAND, tile(14, 0))
+        assign(BlockIDs.GRAVEL, tile(20, 0))
+        assign(BlockIDs.GOLD_ORE, tile(0, 2))
+        assign(BlockIDs.IRON_ORE, tile(1, 2))
+        assign(BlockIDs.COAL_ORE, tile(2, 2))
+        assign(
+            BlockIDs.LOG, lambda meta: tile(8, 1) + meta * 2,
+            top=lambda meta: tile(9, 1) + meta * 2, bottom=lambda meta: tile(9, 1) + meta * 2
+        )
+        assign(BlockIDs.LEAVES, lambda meta: tile(30, 2) + meta)
+        assign(BlockIDs.SPONGE, tile(24, 2))
+        assign(BlockIDs.GLASS, tile(25, 2))
+        assign(BlockIDs.LAPIS_LAZULI_ORE, tile(3, 2))
+        assign(BlockIDs.LAPIS_LAZULI_BLOCK, tile(20, 1))
+        assign(BlockIDs.SANDSTONE, lambda meta: tile(15, 0) + meta, top=tile(18, 0), bottom=tile(19, 0))
+        assign(BlockIDs.BED, TILE_MISSING, metas=(0, ), top=tile(5, 5), front=tile(6, 5), right=tile(7, 5),
+               left=TILE_HANDLER)
+        assign(BlockIDs.BED, TILE_MISSING, metas=(1, ), top=tile(8, 5), back=tile(9, 5), right=tile(10, 5),
+               left=TILE_HANDLER)
+        assign(BlockIDs.POWERED_RAIL, TILE_MISSING, top=tile(0, 5))
+        assign(BlockIDs.COBWEB, tile(1, 1), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign((BlockIDs.DEAD_SHRUB, BlockIDs.BEAD_BUSH), tile(9, 2), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.WOOL, lambda meta: tile(24, 7) + meta)
+        assign(BlockIDs.YELLOW_FLOWER, tile(3, 1), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.CYAN_FLOWER, tile(2, 1), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.BROWN_MUSHROOM, tile(31, 0), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.RED_MUSHROOM, tile(30, 0), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.GOLD_BLOCK, tile(17, 1))
+        assign(BlockIDs.IRON_BLOCK, tile(16, 1))
+        assign(BlockIDs.DOUBLE_STONE_SLAB, tile(27, 0), top=tile(26, 0), bottom=tile(26, 0))
+        assign(BlockIDs.STONE_SLAB, TILE_HANDLER, top=tile(26, 0), bottom=tile(26, 0))
+        assign(BlockIDs.BRICK_BLOCK, tile(28, 0))
+        assign(BlockIDs.TNT, tile(29, 0), top=tile(30, 0), bottom=tile(31, 0))
+        assign(BlockIDs.BOOKSHELF, tile(0, 1), top=plank, bottom=plank)
+        assign(BlockIDs.MOSSY_COBBLESTONE, tile(6, 0))
+        assign(BlockIDs.OBSIDIAN, tile(12, 0))
+        assign(BlockIDs.TORCH, tile(18, 3), top=TILE_HANDLER, bottom=TILE_HANDLER)
+        assign(BlockIDs.FIRE, TILE_INVISIBLE)
+        assign(BlockIDs.MOB_SPAWNER, tile(6, 3))
+        assign(BlockIDs.WOODEN_STAIRS, plank, left=TILE_HANDLER, right=TILE_HANDLER)
+        assign(BlockIDs.CHEST, tile(19, 7), bottom=tile(18, 7), front=tile(20, 7))
+        assign(BlockIDs.DIAMOND_ORE, tile(4, 2))
+        assign(BlockIDs.DIAMOND_BLOCK, tile(18, 1))
+        assign(BlockIDs.CRAFTING_TABLE, tile(15, 2), top=tile(13, 2), bottom=plank, left=tile(14, 2),
+               right=tile(14, 2))
+        assign(BlockIDs.WHEAT_SEEDS, TILE_INVISIBLE)
+        assign(BlockIDs.FARMLAND, TILE_HANDLER, top=lambda meta: tile(29, 3) - meta, bottom=dirt)
+        assign(BlockIDs.FURNACE, tile(19, 2), front=tile(16, 2), top=tile(18, 2), bottom=tile(18, 2))
+        assign(BlockIDs.BURNING_FURNACE, tile(19, 2), front=tile(17, 2), top=tile(18, 2), bottom=tile(18, 2))
+        assign((BlockIDs.SIGN_POST, BlockIDs.WOODEN_DOOR, BlockIDs.LADDER), TILE_INVISIBLE)
+        assign(BlockIDs.RAIL, lambda meta: tile(29, 4) + meta)  # TODO rotation
+        assign(BlockIDs.COBBLESTONE_STAIRS, tile(5, 0), left=TILE_HANDLER, right=TILE_HANDLER)
+        assign((BlockIDs.WALL_SIGN, BlockIDs.IRON_DOOR), TILE_INVISIBLE)
+        assign((BlockIDs.REDSTONE_ORE, BlockIDs.GLOWING_REDSTONE_ORE), tile(5, 2))
+        assign(BlockIDs.SNOW, TILE_HANDLER, top=tile(7, 3), bottom=tile(7, 3))
+        assign(BlockIDs.ICE, tile(8, 3))
+        assign(BlockIDs.SNOW_BLOCK, tile(7, 3))
+        assign(BlockIDs.CACTUS, tile(10, 3), top=tile(9, 3), bottom=tile(11, 3))
+        assign(BlockIDs.CLAY_BLOCK, tile(13, 0))
+        assign(BlockIDs.SUGAR_CANE, tile(12, 3), top=TILE_INVISIBLE, bottom=TILE_INVISIBLE)
+        assign(BlockIDs.FENCE, TILE_HANDLER)
+        assign(BlockIDs.NETHERRACK, tile(11, 4))
+        assign(BlockIDs.TRAPDOOR, tile(4, 4))
+        assign(BlockIDs.STONE_BRICKS, lambda meta: tile(7, 0) + meta)
+        assign(
+            (
+                BlockIDs.BID_23, BlockIDs.BID_25, BlockIDs.BID_28, BlockIDs.BID_29, BlockIDs.BID_33, BlockIDs.BID_34,
+                BlockIDs.BID_36, BlockIDs.BID_55, BlockIDs.BID_69, BlockIDs.BID_70, BlockIDs.BID_72, BlockIDs.BID_75,
+                BlockIDs.BID_76, BlockIDs.BID_77, BlockIDs.BID_84, BlockIDs.BID_86, BlockIDs.BID_88, BlockIDs.BID_89,
+                BlockIDs.BID_90, BlockIDs.BID_91, BlockIDs.BID_92, BlockIDs.BID_93, BlockIDs.BID_94, BlockIDs.BID_95,
+                BlockIDs.BID_97, BlockIDs.BID_99, BlockIDs.BID_100
+            ),
+            does_not_exist
+        )
+        return table
+
+    def _bed(self, block: Block, face: Face) -> Image.Image:
+        return self._from_atlas_coord(7 if block.meta == 0 else 10, 5).transform(
+            (self.TEXTURE_SIZE, self.TEXTURE_SIZE),
+            Image.FLIP_LEFT_RIGHT
+        )
+
+    def _torch(self, block: Block, face: Face) -> Image.Image:
+        view = self.INVISIBLE.copy()
+        y = 6 if face == 'top' else 8
+        view.paste(
+            self._from_atlas_coord(18, 3).crop((7, y, 9, y + 2)),
+            (7, y)
+        )
+        return view
+
+    def _farmland(self, block: Block, face: Face) -> Image.Image:
+        transparent = self.INVISIBLE.copy().crop((0, 0, int(self.TEXTURE_SIZE * 0.1), int(self.TEXTURE_SIZE * 0.1)))
+        view = self._from_block(Block.from_id(BlockIDs.DIRT), face=face).copy()
+        view.paste(transparent)
+        return view
+
+    def _snow(self, block: Block, face: Face) -> Image.Image:
+        transparent = self.INVISIBLE.copy().crop((0, 0, int(self.TEXTURE_SIZE * 0.95), int(self.TEXTURE_SIZE * 0.95)))
+        view = self._from_atlas_coord(7, 3).copy()
+        view.paste(transparent)
+        return view
+
+    def texture_indices(self, block_ids: np.ndarray, block_meta: np.ndarray, face: Face) -> np.ndarray:
+        """
+        Look up the textures of a face of many blocks at once in ``texture_table``.
+        Returns an atlas tile index or one of ``TILE_INVISIBLE``, ``TILE_MISSING`` and ``TILE_HANDLER`` per block.
+        """
+        return self.texture_table[block_ids, block_meta, FACES.index(face)]
+
+    def _map_texture(self, block: Block, face: Face) -> Image.Image:
+        tile = int(self.texture_table[block.id, block.meta, FACES.index(face)])
+        if tile >= 0:
+            return self._atlas_tiles[tile]
+        if tile == TILE_INVISIBLE:
+            return self.INVISIBLE
+        if tile == TILE_MISSING:
+            return self.MISSING
+
+        if block.id == BlockIDs.FENCE:
+            return self._fence_texture(face, self._fence_connections(block, self.world))
+        return self._cached_texture(
+            (block.id, block.meta, face, 0), lambda: self._texture_handlers[block.id](block, face)
+        )
+
+    def _fence_texture(self, face: Face, connections: int) -> Image.Image:
+        return self._cached_texture((BlockIDs.FENCE, 0, face, connections), lambda: self._fence(face, connections))
+
+    def _cached_texture(self, key: tuple[int, int, Face, int], create: Callable[[], Image.Image]) -> Image.Image:
+        """Get a texture created by a handler from the texture cache, creating it if it is not cached."""
+        texture = self._texture_cache.get(key)
+        if texture is not None:
+            self.texture_cache_hits += 1
+            return texture
+        self.texture_cache_misses += 1
+        texture = self._texture_cache[key] = create()
+        return texture
+
+    def _composite(self, lower: Image.Image, upper: Image.Image) -> Image.Image:
+        """Composite two textures, cached by the cached textures they are made of."""
+        key = (id(lower), id(upper))
+        texture = self._composite_cache.get(key)
+        if texture is not None:
+            self.texture_cache_hits += 1
+            return texture
+        self.texture_cache_misses += 1
+        texture = self._composite_cache[key] = Image.alpha_composite(lower, upper)
+        return texture
 
     def _from_block(self, block: Block, face: Face) -> Image.Image:
         if block.is_transparent:
             if block.position.y > 0 and self.world is not None:
                 try:
-                    return Image.alpha_composite(
+                    return self._composite(
                         self._from_block(self.world.get_block(block.position.down()), 'top'),
                         self._map_texture(block, face)
                     )
@@ -498,3 +439,301 @@ class TextureMapper:
 
     def right(self, block: Block) -> Image.Image:
         return self._from_block(block, 'right')
+
+    def render_top_down(self, world: World = None) -> Image.Image:
+        """
+        Render the top faces of the highest non-air block of each column of ``world`` (the mapper's world by default),
+        darkened by depth. Transparent blocks are drawn over the blocks below them.
+
+        The blocks of all columns are looked up layer by layer in ``texture_table``,
+        the distinct textures are composited and shaded once and gathered into one array.
+        """
+        world = world if world is not None else self.world
+        heights = world.heightmap()
+        top_ids, top_meta = world.top_blocks()
+        return self._to_image(self._render_columns(
+            world, heights, top_ids, top_meta, 0, 0,
+            lambda: world.get_region(
+                Position(x=0, y=0, z=0),
+                Position(x=heights.shape[0] - 1, y=Chunk.Y_SIZE - 1, z=heights.shape[1] - 1),
+                planes=('block_ids', 'block_meta')
+            )
+        ))
+
+    def render_chunk(self, chunk_position: Position, world: World = None) -> Image.Image:
+        """Render a top-down view of the chunk at ``chunk_position`` of ``world`` like ``render_top_down``."""
+        world = world if world is not None else self.world
+        chunk = world.get_chunk(chunk_position)
+        return self._to_image(self._render_columns(
+            world, chunk.heightmap, chunk.top_block_ids, chunk.top_block_meta,
+            chunk_position.x * Chunk.X_SIZE, chunk_position.z * Chunk.Z_SIZE,
+            lambda: {name: chunk.get_plane(name) for name in ('block_ids', 'block_meta')}
+        ))
+
+    def _to_image(self, view: np.ndarray) -> Image.Image:
+        size_x, size_z = view.shape[:2]
+        # Images are indexed by [row, column], so z becomes the row and x the column of the image
+        return Image.fromarray(
+            view.transpose(1, 2, 0, 3, 4).reshape(size_z * self.TEXTURE_SIZE, size_x * self.TEXTURE_SIZE, 4), 'RGBA'
+        )
+
+    def _render_columns(self, world: World, heights: np.ndarray, top_ids: np.ndarray, top_meta: np.ndarray,
+                        origin_x: int, origin_z: int, get_region: Callable[[], dict[str, np.ndarray]]) -> np.ndarray:
+        """
+        Render the columns of an area of ``world`` starting at (``origin_x``, ``origin_z``) from its heightmap
+        and top blocks indexed by [x, z]. ``get_region`` returns the block ids and meta values of the area
+        indexed by [x, z, y], it is only called if the columns have transparent top blocks.
+        Returns the texture of each column indexed by [x, z, row, column, channel].
+        """
+        size_x, size_z = heights.shape
+        view = np.zeros((size_x, size_z, self.TEXTURE_SIZE, self.TEXTURE_SIZE, 4), np.uint8)
+        if not (heights >= 0).any():
+            return view
+        columns_x, columns_z = np.nonzero(heights >= 0)
+        columns_y = heights[columns_x, columns_z].astype(np.int64)
+
+        # Textures are referenced by their index, starting with the atlas tiles
+        textures = list(self._atlas_tiles)
+        texture_indices = {id(texture): idx for idx, texture in enumerate(textures)}
+
+        def texture_index(texture: Image.Image) -> int:
+            if id(texture) not in texture_indices:
+                texture_indices[id(texture)] = len(textures)
+                textures.append(texture)
+            return texture_indices[id(texture)]
+
+        def layer_textures(xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, block_ids: np.ndarray,
+                           block_meta: np.ndarray) -> np.ndarray:
+            layer = self.texture_indices(block_ids, block_meta, 'top').astype(np.int64)
+            special = np.flatnonzero(layer < 0)
+            keys, first, inverse = np.unique(
+                block_ids[special].astype(np.int64) * 16 + block_meta[special], return_index=True, return_inverse=True
+            )
+            special_textures = np.array([
+                texture_index(self._map_texture(
+                    Block(position=Position(x=0, y=0, z=0), id=int(key) // 16, meta=int(key) % 16, sky_light=0,
+                          block_light=0),
+                    'top'
+                ))
+                for key in keys
+            ], np.int64)
+            layer[special] = special_textures[inverse.reshape(-1)]
+            for idx in np.flatnonzero(block_ids == BlockIDs.FENCE):
+                fence = Block(
+                    position=Position(x=origin_x + int(xs[idx]), y=int(ys[idx]), z=origin_z + int(zs[idx])),
+                    id=BlockIDs.FENCE,
+                    meta=int(block_meta[idx]), sky_light=0, block_light=0
+                )
+                layer[idx] = texture_index(self._fence_texture('top', self._fence_connections(fence, world)))
+            return layer
+
+        # Follow each column down through transparent blocks, as ``_from_block`` does
+        region = None
+        layers = []
+        active = np.arange(len(columns_x))
+        ys = columns_y
+        block_ids = top_ids[columns_x, columns_z]
+        block_meta = top_meta[columns_x, columns_z]
+        while len(active):
+            xs, zs = columns_x[active], columns_z[active]
+            transparent = TRANSPARENCY[block_ids]
+            layer = layer_textures(xs, ys, zs, block_ids, block_meta)
+            layer[transparent & (ys == 0)] = texture_index(self.INVISIBLE)
+            continues = transparent & (ys > 0)
+            layers.append((active, layer, continues))
+            if not continues.any():
+                break
+            if region is None:
+                region = get_region()
+            active, ys = active[continues], ys[continues] - 1
+            block_ids = region['block_ids'][columns_x[active], columns_z[active], ys]
+            block_meta = region['block_meta'][columns_x[active], columns_z[active], ys]
+
+        # Composite the layers from the bottom up, each distinct pair of textures once
+        column_textures = np.zeros(len(columns_x), np.int64)
+        for active, layer, continues in reversed(layers):
+            layer = layer.copy()
+            if continues.any():
+                lower = column_textures[active[continues]]
+                pairs, inverse = np.unique(np.stack((lower, layer[continues])), axis=1, return_inverse=True)
+                composites = np.array([
+                    texture_index(self._composite(textures[lower_idx], textures[upper_idx]))
+                    for lower_idx, upper_idx in pairs.T.tolist()
+                ], np.int64)
+                layer[continues] = composites[inverse.reshape(-1)]
+            column_textures[active] = layer
+
+        # Shade each distinct pair of texture and height once, like a black overlay with alpha 127 - y
+        pairs, inverse = np.unique(np.stack((column_textures, columns_y)), axis=1, return_inverse=True)
+        pixels = np.stack([np.asarray(textures[idx]) for idx in pairs[0]])
+        shaded = self._shade(pixels, pairs[1])
+
+        view[columns_x, columns_z] = shaded[inverse.reshape(-1)]
+        return view
+
+    @staticmethod
+    def _shade(pixels: np.ndarray, heights: np.ndarray) -> np.ndarray:
+        """
+        Composite a black overlay with alpha 127 - y onto RGBA textures of blocks at the given heights,
+        with the integer arithmetic of ``Image.alpha_composite`` so the result is identical.
+        """
+        pixels = pixels.astype(np.int32)
+        src_alpha = (Chunk.Y_SIZE - 1 - heights.astype(np.int32))[:, None, None, None]
+        dst_alpha = pixels[..., 3:]
+        out_alpha_255 = src_alpha * 255 + dst_alpha * (255 - src_alpha)
+        coef = 255 * 2 ** 7 - src_alpha * 255 * 255 * 2 ** 7 // np.maximum(out_alpha_255, 1)
+
+        def div_255(values: np.ndarray) -> np.ndarray:
+            return ((values >> 8) + values) >> 8
+
+        shaded = np.concatenate((div_255(pixels[..., :3] * coef + (0x80 << 7)) >> 7, div_255(out_alpha_255 + 0x80)), -1)
+        # A transparent overlay keeps the texture unchanged
+        return np.where(src_alpha == 0, pixels, shaded).astype(np.uint8)
+
+    @staticmethod
+    def tile_path(out_dir: Path, zoom: int, tile_x: int, tile_z: int) -> Path:
+        """The path of a map tile written by ``render_tiles``."""
+        return out_dir / str(zoom) / f'{tile_x}_{tile_z}.png'
+
+    def _write_chunk_tile(self, out_dir: Path, chunk_position: Position) -> None:
+        path = self.tile_path(out_dir, self.MAX_ZOOM, chunk_position.x, chunk_position.z)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.render_chunk(chunk_position).save(path)
+
+    @classmethod
+    def _combine_tile(cls, out_dir: Path, zoom: int, tile_x: int, tile_z: int) -> None:
+        """
+        Combine the (up to) four tiles of zoom level ``zoom + 1`` covered by a tile into the tile.
+        The tile is removed if none of them exist.
+        """
+        view = Image.new('RGBA', (cls.TILE_SIZE * 2, cls.TILE_SIZE * 2))
+        children = 0
+        for offset_x in (0, 1):
+            for offset_z in (0, 1):
+                child_path = cls.tile_path(out_dir, zoom + 1, tile_x * 2 + offset_x, tile_z * 2 + offset_z)
+                if child_path.exists():
+                    children += 1
+                    with Image.open(child_path) as child:
+                        view.paste(child, (offset_x * cls.TILE_SIZE, offset_z * cls.TILE_SIZE))
+        path = cls.tile_path(out_dir, zoom, tile_x, tile_z)
+        if not children:
+            path.unlink(missing_ok=True)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        view.resize((cls.TILE_SIZE, cls.TILE_SIZE), Image.Resampling.BOX).save(path)
+
+    def _tile_keys(self) -> dict[tuple[int, int], str]:
+        """
+        Get the content each chunk tile is rendered from by chunk position: the content hash of the chunk and,
+        as fences connect to blocks across chunk borders, the hashes of the neighbouring chunks of chunks with fences.
+        """
+        world = self.world
+        size = world.MAX_CHUNKS_PER_DIRECTION
+        hashes = world.chunk_hashes()
+        keys = {}
+        for idx, chunk_hash in enumerate(hashes):
+            if chunk_hash is None:
+                continue
+            chunk_position = world.index_to_chunk_position(idx)
+            key = [chunk_hash]
+            if world.chunks[idx].block_counts[BlockIDs.FENCE]:
+                for neighbour_x, neighbour_z in (
+                        (chunk_position.x - 1, chunk_position.z), (chunk_position.x + 1, chunk_position.z),
+                        (chunk_position.x, chunk_position.z - 1), (chunk_position.x, chunk_position.z + 1)
+                ):
+                    if 0 <= neighbour_x < size and 0 <= neighbour_z < size:
+                        neighbour_idx = world.chunk_position_to_index(Position(x=neighbour_x, y=0, z=neighbour_z))
+                        key.append(hashes[neighbour_idx] or '-')
+            keys[chunk_position.x, chunk_position.z] = ' '.join(key)
+        return keys
+
+    def _write_tile_manifest(self, out_dir: Path, keys: dict[tuple[int, int], str]) -> None:
+        (out_dir / self.TILE_MANIFEST).write_text(json.dumps({
+            f'{tile_x}_{tile_z}': key for (tile_x, tile_z), key in keys.items()
+        }))
+
+    def _read_tile_manifest(self, out_dir: Path) -> dict[tuple[int, int], str]:
+        path = out_dir / self.TILE_MANIFEST
+        if not path.exists():
+            return {}
+        return {
+            tuple(int(coordinate) for coordinate in name.split('_')): key
+            for name, key in json.loads(path.read_text()).items()
+        }
+
+    def render_tiles(self, out_dir: PathLike | str, workers: int = None) -> int:
+        """
+        Render a top-down view of the mapper's world into a pyramid of map tiles ``out_dir/<zoom>/<x>_<z>.png``.
+        Zoom level ``MAX_ZOOM`` has one tile per chunk, each lower zoom level combines 2x2 tiles of the level above
+        at half the resolution, down to zoom level 0 with a single tile. Tiles of empty chunks are not written.
+
+        Each tile is written as soon as it is rendered, so only a few tiles are kept in memory at once.
+        With ``workers`` greater than one the tiles are rendered by a pool of that many processes
+        which load the world from the file it was saved to.
+        The content each tile was rendered from is recorded for ``render_incremental``.
+        Returns the number of written tiles.
+        """
+        out_dir = Path(out_dir)
+        keys = self._tile_keys()
+        count = self._render_tile_pyramid(out_dir, sorted(keys), workers)
+        self._write_tile_manifest(out_dir, keys)
+        return count
+
+    def render_incremental(self, out_dir: PathLike | str, workers: int = None) -> int:
+        """
+        Update the map tiles written by ``render_tiles`` to the current state of the mapper's world.
+        Only the tiles of chunks that changed since they were last rendered (or whose neighbouring chunks changed,
+        if fences can connect to them) are rendered again, together with the tiles of the lower zoom levels
+        covering them. Tiles of chunks that became empty are removed.
+        Returns the number of written tiles.
+        """
+        out_dir = Path(out_dir)
+        rendered_keys = self._read_tile_manifest(out_dir)
+        keys = self._tile_keys()
+        changed = sorted(
+            chunk_position for chunk_position, key in keys.items() if rendered_keys.get(chunk_position) != key
+        )
+        removed = sorted(chunk_position for chunk_position in rendered_keys if chunk_position not in keys)
+        for tile_x, tile_z in removed:
+            self.tile_path(out_dir, self.MAX_ZOOM, tile_x, tile_z).unlink(missing_ok=True)
+        logging.getLogger(__name__).debug(f'{len(changed)} changed and {len(removed)} removed chunk tiles')
+        count = self._render_tile_pyramid(out_dir, changed, workers, removed)
+        self._write_tile_manifest(out_dir, keys)
+        return count
+
+    def _render_tile_pyramid(self, out_dir: Path, chunk_positions: list[tuple[int, int]], workers: int | None,
+                             removed: list[tuple[int, int]] = ()) -> int:
+        """
+        Render the tiles of ``chunk_positions`` and the tiles of the lower zoom levels
+        covering them or the ``removed`` chunk tiles.
+        """
+        if workers is not None and workers > 1 and (self.world.path is None or self.world.changed_chunks()):
+            raise ValueError('The world must be saved before its tiles can be rendered by multiple processes')
+        if not chunk_positions and not removed:
+            return 0
+        levels = [chunk_positions]
+        tiles = [*chunk_positions, *removed]
+        for zoom in range(self.MAX_ZOOM - 1, -1, -1):
+            tiles = sorted({(tile_x // 2, tile_z // 2) for tile_x, tile_z in tiles})
+            levels.append(tiles)
+
+        if workers is None or workers <= 1:
+            for chunk_x, chunk_z in chunk_positions:
+                self._write_chunk_tile(out_dir, Position(x=chunk_x, y=0, z=chunk_z))
+            for zoom, tiles in zip(range(self.MAX_ZOOM - 1, -1, -1), levels[1:]):
+                for tile_x, tile_z in tiles:
+                    self._combine_tile(out_dir, zoom, tile_x, tile_z)
+        else:
+            def batches(tiles: list[tuple[int, int]]) -> list[list[tuple[int, int]]]:
+                batch_size = max(1, len(tiles) // (workers * 4))
+                return [tiles[start:start + batch_size] for start in range(0, len(tiles), batch_size)]
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(
+                    _render_tile_batch, repeat(str(self.world.path)), repeat(str(out_dir)), batches(chunk_positions)
+                ))
+                # Each zoom level needs the tiles of the level above, so the levels are combined one after another
+                for zoom, tiles in zip(range(self.MAX_ZOOM - 1, -1, -1), levels[1:]):
+                    list(executor.map(_combine_tile_batch, repeat(str(out_dir)), repeat(zoom), batches(tiles)))
+        logging.getLogger(__name__).debug(f'Rendered {sum(map(len, levels))} tiles to {out_dir}')
+        return sum(map(len, levels))
@@ -0,0 +1,19 @@
+import numpy as np
+from PIL import Image
+
+from pymine import Chunk
+from pymine.mappers import TextureMapper
+
+
+def test_shade_matches_alpha_composite():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (Chunk.Y_SIZE, 16, 16, 4), dtype=np.uint8)
+    pixels[:, :4, :, 3] = 0
+    pixels[:, 4:8, :, 3] = 255
+    heights = np.arange(Chunk.Y_SIZE)
+    shaded = TextureMapper._shade(pixels, heights)
+    for texture, shaded_texture, y in zip(pixels, shaded, heights):
+        expected = Image.alpha_composite(
+            Image.fromarray(texture, 'RGBA'), Image.new('RGBA', (16, 16), (0, 0, 0, Chunk.Y_SIZE - 1 - int(y)))
+        )
+        assert np.array_equal(shaded_texture, np.asarray(expected))
@@ -0,0 +1,188 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from pymine import World, Chunk, Block, Position, BlockIDs
+from pymine.chunks import EmptyChunk
+
+
+@pytest.fixture
+def world_path(tmp_path):
+    rng = np.random.default_rng(0)
+    chunks = [
+        Chunk(
+            block_ids=rng.integers(0, 100, Chunk.BLOCK_COUNT, dtype=np.uint8),
+            block_meta=rng.integers(0, 256, Chunk.BLOCK_COUNT // 2, dtype=np.uint8),
+            sky_light=rng.integers(0, 256, Chunk.BLOCK_COUNT // 2, dtype=np.uint8),
+            block_light=rng.integers(0, 256, Chunk.BLOCK_COUNT // 2, dtype=np.uint8),
+            biomes=rng.integers(0, 256, Chunk.X_SIZE * Chunk.Z_SIZE, dtype=np.uint8),
+        )
+        for _ in range(64)
+    ]
+    path = tmp_path / 'chunks.dat'
+    World(chunks=chunks).save(path)
+    return path
+
+
+@pytest.mark.parametrize('load_options', [
+    {},
+    {'memory_map': True},
+    {'deduplicate': True},
+    {'workers': 2},
+    {'lazy': True, 'cache_size': 1},
+    {'lazy': True, 'cache_size': 1, 'memory_map': True},
+])
+def test_save_load_round_trip(world_path, tmp_path, load_options):
+    World.load(world_path, **load_options).save(tmp_path / 'saved.dat')
+    assert (tmp_path / 'saved.dat').read_bytes() == world_path.read_bytes()
+
+
+@pytest.mark.parametrize('load_options', [{}, {'deduplicate': True}, {'lazy': True, 'cache_size': 1}])
+def test_write_to_non_seekable_file(world_path, tmp_path, load_options):
+    with gzip.open(tmp_path / 'chunks.dat.gz', 'wb') as f:
+        World.load(world_path, **load_options).write_to(f)
+    with gzip.open(tmp_path / 'chunks.dat.gz', 'rb') as f:
+        assert f.read() == world_path.read_bytes()
+
+
+def test_load_with_workers(world_path):
+    expected = World.load(world_path)
+    world = World.load(world_path, workers=2)
+    for chunk, expected_chunk in zip(world, expected):
+        assert chunk._top_blocks is not None and chunk._content_hash is not None
+        assert np.array_equal(chunk.heightmap, expected_chunk.heightmap)
+        assert np.array_equal(chunk.top_block_ids, expected_chunk.top_block_ids)
+        assert np.array_equal(chunk.top_block_meta, expected_chunk.top_block_meta)
+        assert np.array_equal(chunk.block_counts, expected_chunk.block_counts)
+        assert chunk.content_hash() == expected_chunk.content_hash()
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_save_changed_lazy_world(world_path, incremental):
+    expected = World.load(world_path)
+    expected.update_block_xyz(20, 5, 20, BlockIDs.STONE)
+
+    world = World.load(world_path, lazy=True, cache_size=1, memory_map=True)
+    world.update_block_xyz(20, 5, 20, BlockIDs.STONE)
+    world.save(world_path, incremental=incremental)
+    assert world_path.read_bytes() == bytes(expected)
+
+
+def test_save_shared_chunks():
+    world = World(chunks=[Chunk.from_layered_template(layers=[BlockIDs.BEDROCK, BlockIDs.DIRT]) for _ in range(16)])
+    world.update_block_xyz(3, 3, 3, BlockIDs.STONE)
+    unshared = World(chunks=[Chunk.from_bytes(bytearray(chunk.payload())) for chunk in world])
+    assert bytes(world) == bytes(unshared)
+
+
+@pytest.fixture
+def sparse_world():
+    chunks = [EmptyChunk() for _ in range(World.MAX_CHUNKS_PER_DIRECTION ** 2)]
+    for idx in (0, 1, 5, 33):
+        chunks[idx] = Chunk.from_layered_template(layers=[BlockIDs.BEDROCK])
+    return World(chunks=chunks)
+
+
+def test_regions_outside_square(sparse_world):
+    sparse_world.fill(Position(x=80, y=1, z=0), Position(x=95, y=3, z=15), BlockIDs.STONE)
+    assert sparse_world.get_block(Position(x=85, y=2, z=3)).id == BlockIDs.STONE
+    assert sparse_world.possible_position(Position(x=85, y=2, z=3))
+    assert not sparse_world.possible_position(Position(x=40, y=2, z=3))
+
+    block_ids = sparse_world.get_region(Position(x=0, y=0, z=0), Position(x=95, y=3, z=31))['block_ids']
+    assert block_ids.shape == (96, 32, 4)
+    assert block_ids[85, 3, 2] == BlockIDs.STONE
+    assert not block_ids[40].any()
+
+    with pytest.raises(ValueError):
+        sparse_world.fill(Position(x=0, y=1, z=0), Position(x=40, y=1, z=0), BlockIDs.STONE)
+    assert sparse_world.get_block(Position(x=0, y=1, z=0)).id == BlockIDs.AIR
+
+
+def test_relight_outside_square(sparse_world):
+    for chunk in sparse_world.non_empty_chunks:
+        chunk.set_plane('sky_light', 0)
+    sparse_world.update_block_xyz(85, 2, 3, BlockIDs.TORCH)
+    sparse_world.relight_sky()
+    sparse_world.relight_block_light()
+    for x, z in ((0, 0), (16, 0), (80, 0), (16, 16)):
+        assert sparse_world.get_block(Position(x=x, y=5, z=z)).sky_light == 15
+    assert sparse_world.get_block(Position(x=85, y=2, z=4)).block_light > 0
+
+
+def test_iter_blocks_duplicate_exclude():
+    chunk = Chunk.from_layered_template(layers=[BlockIDs.STONE] * (Chunk.Y_SIZE // 2))
+    blocks = list(chunk.iter_blocks(read_only=True, exclude=[BlockIDs.AIR, BlockIDs.AIR]))
+    assert len(blocks) == Chunk.BLOCK_COUNT // 2
+
+
+def test_edit_uncached_lazy_world(world_path):
+    def edit(world):
+        world.replace_block(
+            Block(position=Position(x=20, y=5, z=20), id=BlockIDs.GLASS, meta=0, sky_light=0, block_light=0)
+        )
+        world.fill(Position(x=0, y=1, z=0), Position(x=3, y=1, z=3), BlockIDs.STONE)
+        world.set_region(Position(x=0, y=2, z=0), {'block_ids': np.full((2, 2, 1), BlockIDs.DIRT, np.uint8)})
+        world.update_block_xyz(17, 6, 17, BlockIDs.TORCH)
+        world.relight_sky()
+        return world
+
+    expected = edit(World.load(world_path))
+    world = edit(World.load(world_path, lazy=True, cache_size=0))
+    assert world.get_block(Position(x=20, y=5, z=20)).id == BlockIDs.GLASS
+    assert world.get_block(Position(x=3, y=1, z=3)).id == BlockIDs.STONE
+    assert world.get_block(Position(x=1, y=2, z=1)).id == BlockIDs.DIRT
+    assert bytes(world) == bytes(expected)
+
+
+def test_heightmap_outside_square(sparse_world):
+    sparse_world.update_block_xyz(85, 7, 3, BlockIDs.STONE)
+    heightmap = sparse_world.heightmap()
+    top_block_ids, _ = sparse_world.top_blocks()
+    assert heightmap.shape == top_block_ids.shape == (96, 32)
+    assert heightmap[85, 3] == 7 and top_block_ids[85, 3] == BlockIDs.STONE
+    assert heightmap[40, 3] == -1 and heightmap[16, 16] == 0
+
+
+@pytest.mark.parametrize('load_options', [{}, {'lazy': True}, {'memory_map': True}])
+def test_save_direct_chunk_edits_incrementally(world_path, load_options):
+    def edit(world):
+        world.get_chunk(Position(x=1, y=0, z=0)).update_block(Position(x=2, y=3, z=4), BlockIDs.GLASS)
+        world.get_chunk(Position(x=3, y=0, z=1)).set_plane('block_ids', BlockIDs.STONE, np.s_[:2, :2, :2])
+        world.get_chunk(Position(x=5, y=0, z=1)).relight_sky()
+
+    expected = World.load(world_path)
+    edit(expected)
+    world = World.load(world_path, **load_options)
+    edit(world)
+    assert world.changed_chunks() == {1, 35, 37}
+    world.save(world_path, incremental=True)
+    assert not world.changed_chunks()
+    assert world_path.read_bytes() == bytes(expected)
+
+
+def test_block_views_write_through(world_path):
+    world = World.load(world_path)
+    block = world.get_block(Position(x=3, y=1, z=2))
+    block.update(block_id=BlockIDs.STONE)
+    block.meta = 5
+    assert world.get_block(Position(x=3, y=1, z=2)).id == BlockIDs.STONE
+    assert world.get_block(Position(x=3, y=1, z=2)).meta == 5
+
+    chunk = world.get_chunk(Position(x=1, y=0, z=0))
+    for block in chunk.iter_blocks(bbox=(Position(x=16, y=0, z=0), Position(x=16, y=0, z=0))):
+        block.id = BlockIDs.GLASS
+    assert chunk.get_block(Position(x=0, y=0, z=0)).id == BlockIDs.GLASS
+    assert world.changed_chunks() == {0, 1}
+
+    world.save(world_path, incremental=True)
+    assert World.load(world_path).get_block(Position(x=3, y=1, z=2)).id == BlockIDs.STONE
+
+
+def test_chunk_from_blocks(world_path):
+    chunk = World.load(world_path).chunks[0]
+    copy = Chunk(blocks=chunk.blocks, biomes=chunk.biomes.tolist())
+    assert bytes(copy) == bytes(chunk)
+    copy.blocks[0].id = BlockIDs.STONE
+    assert copy.block_ids[0] == BlockIDs.STONE and chunk.block_ids[0] != BlockIDs.STONE